@@ -0,0 +1,181 @@
+"""
+Adaptive Stratified Block Sampling
+Spends the per-day API budget where transaction counts vary the most and stops as
+soon as the daily total is known precisely enough
+
+Author: Yuyan Kuang
+Date: January 2026
+"""
+
+import math
+import random
+from statistics import NormalDist
+
+Z_975 = NormalDist().inv_cdf(0.975)
+
+
+def t_factor(dof):
+    """
+    Ratio of the Student-t to the normal 97.5% quantile for `dof` degrees of freedom
+
+    Uses the Cornish-Fisher expansion of the t quantile, which is within 1%
+    of the exact value from 3 degrees of freedom up.
+    """
+    if dof <= 0:
+        return float('inf')
+    z = Z_975
+    t = (z + (z ** 3 + z) / (4 * dof) + (5 * z ** 5 + 16 * z ** 3 + 3 * z) / (96 * dof ** 2)
+         + (3 * z ** 7 + 19 * z ** 5 + 17 * z ** 3 - 15 * z) / (384 * dof ** 3))
+    return t / z
+
+
+class AdaptiveSampler:
+    """
+    Variance-driven stratified sampler for one day's block range
+
+    The range is split into equal contiguous strata (different times of day).
+    Each stratum is sampled `min_per_stratum` times, then further blocks go to
+    the strata with the largest contribution to the variance of the estimated
+    total (Neyman allocation) until the relative standard error drops below
+    `target_rel_error` or `max_requests` block requests have been spent.
+
+    With only a handful of blocks per stratum the stratum variances are
+    noisy, and both the allocation and the early stop would chase strata
+    that happen to look quiet. Each stratum's variance is therefore shrunk
+    toward the variance pooled over all strata (worth `shrinkage` samples),
+    and the standard error is widened by the Student-t quantile for the
+    pooled degrees of freedom, so that estimate() gives a standard error
+    with close to nominal coverage.
+
+    Usage: call next_batch() for block numbers to fetch, feed each result to
+    add(), repeat until next_batch() returns an empty list, then estimate().
+    """
+
+    def __init__(self, start_block, end_block, strata=5, min_per_stratum=3,
+                 max_requests=20, target_rel_error=0.05, shrinkage=10, seed=None):
+        self.start_block = start_block
+        self.end_block = end_block
+        self.min_per_stratum = min_per_stratum
+        self.shrinkage = shrinkage
+        self.max_requests = max_requests
+        self.target_rel_error = target_rel_error
+        # Seeded by the range so re-runs pick the same (cacheable) blocks
+        self._rng = random.Random(start_block if seed is None else seed)
+        self.requests = 0
+
+        total_blocks = end_block - start_block + 1
+        strata = max(1, min(strata, total_blocks))
+        edges = [start_block + (total_blocks * h) // strata for h in range(strata + 1)]
+        self._strata = [
+            {'first': edges[h], 'size': edges[h + 1] - edges[h], 'attempts': 0,
+             'n': 0, 'mean': 0.0, 'm2': 0.0, 'sampled': set()}
+            for h in range(strata)
+        ]
+        self._stratum_of = {}
+
+    def _draw(self, stratum):
+        """Pick an unsampled block from a stratum, or None if all were sampled"""
+        if len(stratum['sampled']) >= stratum['size']:
+            return None
+        while True:
+            block_num = stratum['first'] + self._rng.randrange(stratum['size'])
+            if block_num not in stratum['sampled']:
+                stratum['sampled'].add(block_num)
+                stratum['attempts'] += 1
+                return block_num
+
+    def next_batch(self):
+        """Block numbers to fetch next; an empty list means sampling is finished"""
+        budget = self.max_requests - self.requests
+        if budget <= 0:
+            return []
+
+        # First make sure every stratum has its minimum number of samples
+        pending = [s for s in self._strata if s['attempts'] < self.min_per_stratum]
+        if not pending:
+            if self.relative_error() <= self.target_rel_error:
+                return []
+            # Neyman allocation: one more block for each stratum whose next
+            # sample reduces the variance of the total the most
+            pooled_var = self._pooled_variance()
+            gains = []
+            for h, s in enumerate(self._strata):
+                n = max(s['n'], 1)
+                gains.append((s['size'] ** 2 * self._variance(s, pooled_var) / (n * (n + 1)), h))
+            # Ties (common with small integer counts) go to the earlier stratum, so
+            # re-runs draw the same blocks
+            gains.sort(key=lambda gain: (-gain[0], gain[1]))
+            pending = [self._strata[h] for _, h in gains[:max(1, (len(gains) + 1) // 2)]]
+
+        batch = []
+        for stratum in pending[:budget]:
+            block_num = self._draw(stratum)
+            if block_num is not None:
+                self._stratum_of[block_num] = stratum
+                batch.append(block_num)
+        self.requests += len(batch)
+        return batch
+
+    def add(self, block_num, tx_count):
+        """Record a fetched block's transaction count (None for a failed request)"""
+        stratum = self._stratum_of[block_num]
+        if tx_count is None:
+            return
+        # Welford update of the stratum's running mean and variance
+        stratum['n'] += 1
+        delta = tx_count - stratum['mean']
+        stratum['mean'] += delta / stratum['n']
+        stratum['m2'] += delta * (tx_count - stratum['mean'])
+
+    def _pooled_variance(self):
+        """Within-stratum variance pooled across strata with 2+ samples"""
+        m2 = sum(s['m2'] for s in self._strata if s['n'] > 1)
+        dof = sum(s['n'] - 1 for s in self._strata if s['n'] > 1)
+        return m2 / dof if dof > 0 else 0.0
+
+    def _variance(self, stratum, pooled_var):
+        """Stratum variance shrunk toward the pooled variance"""
+        dof = stratum['n'] - 1
+        if dof <= 0:
+            return pooled_var
+        return (self.shrinkage * pooled_var + stratum['m2']) / (self.shrinkage + dof)
+
+    def _overall_mean(self):
+        n = sum(s['n'] for s in self._strata)
+        return sum(s['mean'] * s['n'] for s in self._strata) / n if n else 0.0
+
+    def estimate(self):
+        """
+        Estimated daily total and its standard error
+
+        Returns:
+        tuple: (estimated transaction count, standard error)
+        """
+        if not any(s['n'] for s in self._strata):
+            return 0, float('nan')
+
+        overall_mean = self._overall_mean()
+        pooled_var = self._pooled_variance()
+        total = 0.0
+        variance = 0.0
+        for s in self._strata:
+            if s['n'] == 0:
+                # No usable sample in this stratum; borrow the day's overall mean
+                total += s['size'] * overall_mean
+                variance += s['size'] ** 2 * pooled_var
+                continue
+            fpc = 1 - s['n'] / s['size']
+            total += s['size'] * s['mean']
+            variance += s['size'] ** 2 * fpc * self._variance(s, pooled_var) / s['n']
+
+        dof = sum(s['n'] - 1 for s in self._strata if s['n'] > 1)
+        if variance == 0:
+            return int(total), 0.0
+        return int(total), math.sqrt(variance) * t_factor(dof)
+
+    def relative_error(self):
+        """Standard error of the estimated total divided by the total"""
+        total, se = self.estimate()
+        if total <= 0 or math.isnan(se):
+            return float('inf')
+        return se / total
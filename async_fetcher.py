@@ -0,0 +1,149 @@
+"""
+Concurrent Fetch Engine for Etherscan Data
+Runs many days and block requests at once under a shared requests-per-second budget
+
+Author: Yuyan Kuang
+Date: January 2026
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from day_boundaries import DayBoundaryResolver
+from rate_limiter import TokenBucket
+
+
+class AsyncEtherscanFetcher:
+    """
+    Asyncio front end for EtherscanDataFetcher
+
+    Every HTTP call still goes through the wrapped fetcher, but calls are run
+    on a thread pool so that boundary lookups and block samples for many days
+    are in flight at the same time. A single TokenBucket installed on the
+    fetcher keeps the combined request rate at or below `requests_per_second`.
+    """
+
+    def __init__(self, fetcher, requests_per_second=5, max_concurrency=8, rate_limiter=None,
+                 journal=None):
+        self.fetcher = fetcher
+        # Pass rate_limiter to share one provider's quota between several engines. No
+        # bursts: calls stay evenly spaced, so the provider's per-second window never
+        # sees more than requests_per_second
+        self.rate_limiter = rate_limiter or TokenBucket(requests_per_second, capacity=1)
+        self.fetcher.rate_limiter = self.rate_limiter
+        self.max_concurrency = max_concurrency
+        self.resolver = DayBoundaryResolver(fetcher)
+        # Optional FetchJournal; every finished day is made durable as it completes
+        self.journal = journal
+        self._executor = None
+
+    async def _call(self, func, *args):
+        """Run a blocking fetcher method on the worker pool"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, func, *args)
+
+    async def fetch_day(self, date, start_block, end_block):
+        """
+        Count one day's transactions once its block range is known
+
+        Parameters:
+        date (datetime): The date being counted
+        start_block (int): First block of the day
+        end_block (int): Last block of the day
+
+        Returns:
+        dict: Same record as EtherscanDataFetcher.get_daily_transaction_count, or None
+        """
+        fetcher = self.fetcher
+
+        try:
+            if fetcher.exact_counter is not None:
+                tx_count = await self._call(fetcher.exact_counter.count_range, start_block, end_block)
+                return fetcher._day_record(date, tx_count, start_block, end_block)
+
+            sampler = fetcher._new_sampler(start_block, end_block)
+            batch = sampler.next_batch()
+            while batch:
+                if fetcher.backend is not None:
+                    # The backend batches on its own; send the whole round at once
+                    counts = await self._call(fetcher.get_block_tx_counts, batch)
+                    counts = [counts.get(block_num) for block_num in batch]
+                else:
+                    counts = await asyncio.gather(
+                        *[self._call(fetcher._get_block_tx_count, block_num) for block_num in batch]
+                    )
+                for block_num, tx_count in zip(batch, counts):
+                    sampler.add(block_num, tx_count)
+                batch = sampler.next_batch()
+
+            tx_count, tx_count_se = sampler.estimate()
+            return fetcher._day_record(date, tx_count, start_block, end_block, tx_count_se)
+
+        except Exception as e:
+            print(f"Error fetching data for {date.strftime('%Y-%m-%d')}: {str(e)}")
+            return None
+
+    async def resolve_days(self, dates):
+        """Resolve every day's block range, looking up all boundaries concurrently"""
+        starts = self.resolver.day_starts(dates)
+        lookups = []
+        for date in starts:
+            timestamp = self.fetcher._day_timestamps(date)[0]
+            lookups.append(self._call(self.resolver.resolve_boundary, timestamp))
+
+        boundaries = {}
+        for date, boundary in zip(starts, await asyncio.gather(*lookups, return_exceptions=True)):
+            if isinstance(boundary, Exception):
+                print(f"Error resolving start block for {date.strftime('%Y-%m-%d')}: {str(boundary)}")
+                boundary = None
+            boundaries[date] = boundary
+
+        return self.resolver.day_ranges(dates, boundaries)
+
+    async def fetch_dates(self, dates, progress=True):
+        """
+        Fetch the given days concurrently
+
+        Returns:
+        list: Day records sorted by date; days that failed are left out
+        """
+        results = []
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+            self._executor = executor
+            try:
+                days = await self.resolve_days(dates)
+                # Bound the days in flight so they finish (and reach the journal)
+                # steadily instead of all together at the end
+                days_in_flight = asyncio.Semaphore(self.max_concurrency)
+
+                async def fetch_bounded(day):
+                    async with days_in_flight:
+                        return await self.fetch_day(*day)
+
+                tasks = [fetch_bounded(day) for day in days]
+                for done, task in enumerate(asyncio.as_completed(tasks), 1):
+                    data = await task
+                    if data:
+                        if self.journal is not None:
+                            self.journal.append_day(self.fetcher.chainid, data)
+                        results.append(data)
+                    if progress:
+                        print(f"Fetched {done}/{len(days)} days...", end='\r')
+            finally:
+                self._executor = None
+
+        results.sort(key=lambda row: row['date'])
+        return results
+
+    async def fetch_range(self, start_date, end_date, progress=True):
+        """Fetch every day between start_date and end_date (inclusive) concurrently"""
+        dates = DayBoundaryResolver.date_range(start_date, end_date)
+        return await self.fetch_dates(dates, progress=progress)
+
+    def run(self, start_date, end_date, progress=True):
+        """Blocking wrapper around fetch_range"""
+        return asyncio.run(self.fetch_range(start_date, end_date, progress=progress))
+
+    def run_dates(self, dates, progress=True):
+        """Blocking wrapper around fetch_dates"""
+        return asyncio.run(self.fetch_dates(dates, progress=progress))
@@ -0,0 +1,232 @@
+"""
+Multi-Chain, Multi-Year Batch Runner
+Fetches a matrix of (chain, date range) jobs under per-provider rate limits, then runs
+the analysis and statistical tests for every job in parallel
+
+Author: Yuyan Kuang
+Date: January 2026
+"""
+
+import argparse
+import asyncio
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+import pandas as pd
+
+from async_fetcher import AsyncEtherscanFetcher
+from block_cache import BlockCache
+from eth_trading_patterns import (EtherscanDataFetcher, TradingPatternAnalyzer,
+                                  find_missing_dates, load_dataset, merge_dataset, save_dataset)
+from http_transport import HttpTransport
+from key_pool import KeyPool
+from online_stats import rolling_weekend_effect
+from rate_limiter import TokenBucket
+from statistical_tests import summarize_weekend_effect
+
+ETHERSCAN_V2_URL = os.getenv('ETHERSCAN_BASE_URL', "https://api.etherscan.io/v2/api")
+
+
+def load_jobs(args):
+    """
+    Build the job list from a JSON file or from --chains x --years
+
+    A jobs file is a list of objects with chainid, start and end (YYYY-MM-DD)
+    and an optional base_url for Etherscan-compatible explorers other than
+    Etherscan v2. Each distinct base_url is a provider with its own rate limit.
+    """
+    if args.jobs_file:
+        with open(args.jobs_file) as f:
+            specs = json.load(f)
+        jobs = [{
+            'chainid': str(spec['chainid']),
+            'start': datetime.strptime(spec['start'], '%Y-%m-%d'),
+            'end': datetime.strptime(spec['end'], '%Y-%m-%d'),
+            'base_url': spec.get('base_url', ETHERSCAN_V2_URL),
+        } for spec in specs]
+    else:
+        first_year, _, last_year = args.years.partition('-')
+        years = range(int(first_year), int(last_year or first_year) + 1)
+        jobs = [{
+            'chainid': chainid.strip(),
+            'start': datetime(year, 1, 1),
+            'end': datetime(year, 12, 31),
+            'base_url': ETHERSCAN_V2_URL,
+        } for chainid in args.chains.split(',') for year in years]
+
+    # Only finished days can be fetched
+    yesterday = datetime.combine(datetime.now(timezone.utc).date(), datetime.min.time()) - timedelta(days=1)
+    for job in jobs:
+        job['end'] = min(job['end'], yesterday)
+    return [job for job in jobs if job['start'] <= job['end']]
+
+
+def job_path(job, output_dir):
+    """Per-job daily dataset file"""
+    return os.path.join(output_dir, f"chain{job['chainid']}_{job['start']:%Y%m%d}_{job['end']:%Y%m%d}.csv")
+
+
+async def fetch_jobs(jobs, api_key, cache, output_dir, rps=5, concurrency=8, parallel_jobs=4,
+                     api_keys=None):
+    """
+    Fetch every job's missing days, sharing one TokenBucket (or, with several
+    api_keys, one KeyPool) per provider
+
+    Returns:
+    list: Dataset path of each job, in job order
+    """
+    limiters = {}
+    transports = {}
+    pools = {}
+    if api_keys and len(api_keys) > 1:
+        concurrency *= len(api_keys)
+    slots = asyncio.Semaphore(parallel_jobs)
+
+    async def run_job(job):
+        provider = job['base_url']
+        key_pool = None
+        if api_keys and len(api_keys) > 1:
+            key_pool = pools.setdefault(provider, KeyPool(api_keys, requests_per_second=rps))
+        # capacity=1: evenly spaced calls never exceed the provider's per-second limit
+        limiter = limiters.setdefault(provider, TokenBucket(key_pool.requests_per_second if key_pool else rps,
+                                                            capacity=1))
+        transport = transports.setdefault(provider, HttpTransport(pool_size=concurrency))
+        fetcher = EtherscanDataFetcher(api_key, cache=cache, transport=transport,
+                                       chainid=job['chainid'], base_url=provider, key_pool=key_pool)
+        path = job_path(job, output_dir)
+        label = f"chain {job['chainid']} {job['start']:%Y-%m-%d}..{job['end']:%Y-%m-%d}"
+
+        existing = load_dataset(path)
+        dates = find_missing_dates(existing, job['start'], job['end'])
+        if not dates:
+            print(f"✓ {label}: up to date")
+            return path
+
+        async with slots:
+            engine = AsyncEtherscanFetcher(fetcher, max_concurrency=concurrency, rate_limiter=limiter)
+            rows = await engine.fetch_dates(dates, progress=False)
+
+        df = merge_dataset(existing, rows)
+        if not df.empty:
+            save_dataset(df, path)
+        print(f"✓ {label}: fetched {len(rows)}/{len(dates)} days")
+        return path
+
+    paths = await asyncio.gather(*[run_job(job) for job in jobs])
+    for key_pool in pools.values():
+        key_pool.report()
+    return paths
+
+
+def analyze_job(task):
+    """
+    Run the TradingPatternAnalyzer and statistical-test stages for one job
+
+    Runs in a worker process; returns one row of the consolidated table.
+    """
+    job, path, n_resamples, n_permutations, seed = task
+    row = {'chainid': job['chainid'], 'start': job['start'].strftime('%Y-%m-%d'),
+           'end': job['end'].strftime('%Y-%m-%d'), 'dataset': path}
+
+    df = load_dataset(path)
+    if df is None or df.empty:
+        row['error'] = 'no data'
+        return row
+
+    analyzer = TradingPatternAnalyzer(df)
+    weekend_days = int(analyzer.df['is_weekend'].sum())
+    if weekend_days < 2 or len(analyzer.df) - weekend_days < 2:
+        row['error'] = 'not enough weekday and weekend days'
+        return row
+
+    row.update(summarize_weekend_effect(analyzer.df, n_resamples=n_resamples,
+                                        n_permutations=n_permutations, seed=seed))
+
+    # Stability of the effect within the period
+    rolling = rolling_weekend_effect(analyzer.df, window=90).dropna(subset=['cohens_d'])
+    if not rolling.empty:
+        row['rolling_d_min'] = rolling['cohens_d'].min()
+        row['rolling_d_max'] = rolling['cohens_d'].max()
+        row['rolling_significant_pct'] = (rolling['t_stat'].abs() > 1.96).mean() * 100
+    return row
+
+
+def parse_args(argv=None):
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description="Run the weekend-effect analysis for many chains and years")
+    parser.add_argument('--chains', default='1',
+                        help="Comma-separated chain IDs (Etherscan v2), e.g. 1,10,8453,42161")
+    parser.add_argument('--years', default='2025', help="Year or year range, e.g. 2022-2025")
+    parser.add_argument('--jobs-file', help="JSON list of {chainid, start, end[, base_url]} jobs")
+    parser.add_argument('--output-dir', default='outputs/batch',
+                        help="Directory for per-job datasets")
+    parser.add_argument('--results', default='outputs/batch_results.csv',
+                        help="Consolidated results table")
+    parser.add_argument('--rps', type=float, default=5,
+                        help="Requests per second per provider (per API key with --api-keys)")
+    parser.add_argument('--concurrency', type=int, default=8,
+                        help="Requests in flight per job (per API key with --api-keys)")
+    parser.add_argument('--api-keys',
+                        help="Comma-separated API keys to shard calls across (default: env ETHERSCAN_API_KEYS)")
+    parser.add_argument('--parallel-jobs', type=int, default=4, help="Jobs fetched at the same time")
+    parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                        help="Processes for the analysis stage")
+    parser.add_argument('--cache', default='outputs/block_cache.sqlite',
+                        help="SQLite block cache shared by all jobs")
+    parser.add_argument('--skip-fetch', action='store_true',
+                        help="Only analyze datasets that are already on disk")
+    parser.add_argument('--bootstrap-resamples', type=int, default=2000)
+    parser.add_argument('--permutations', type=int, default=10000)
+    parser.add_argument('--seed', type=int, default=0)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Main execution function"""
+    args = parse_args(argv)
+
+    print("\n" + "="*50)
+    print("BATCH WEEKEND EFFECT ANALYSIS")
+    print("="*50 + "\n")
+
+    jobs = load_jobs(args)
+    os.makedirs(args.output_dir, exist_ok=True)
+    print(f"{len(jobs)} job(s) across {len({job['chainid'] for job in jobs})} chain(s)\n")
+
+    if args.skip_fetch:
+        paths = [job_path(job, args.output_dir) for job in jobs]
+    else:
+        api_keys = [key.strip() for key in (args.api_keys or os.getenv('ETHERSCAN_API_KEYS', '')).split(',')
+                    if key.strip()]
+        api_key = api_keys[0] if api_keys else os.getenv('ETHERSCAN_API_KEY')
+        if not api_key:
+            print("Please enter your Etherscan API key:")
+            api_key = input("API Key: ").strip()
+
+        cache = BlockCache(args.cache)
+        paths = asyncio.run(fetch_jobs(jobs, api_key, cache, args.output_dir, rps=args.rps,
+                                       concurrency=args.concurrency,
+                                       parallel_jobs=args.parallel_jobs, api_keys=api_keys))
+        cache.report()
+        cache.close()
+
+    print("\nRunning analyses...")
+    tasks = [(job, path, args.bootstrap_resamples, args.permutations, args.seed)
+             for job, path in zip(jobs, paths)]
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        rows = list(executor.map(analyze_job, tasks))
+
+    results = pd.DataFrame(rows)
+    save_dataset(results, args.results)
+    print(f"✓ Saved consolidated results: {args.results} ({len(results)} jobs)\n")
+
+    columns = [c for c in ['chainid', 'start', 'end', 'days', 'pct_difference', 'cohens_d', 'p_value_t']
+               if c in results]
+    print(results[columns].to_string(index=False))
+    print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""
+Fetch Throughput Benchmark
+Runs the fetch path against the local synthetic Etherscan stand-in and reports
+requests/sec, days/sec, request latency percentiles and wall time
+
+Author: Yuyan Kuang
+Date: January 2026
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from block_cache import BlockCache
+from chain_simulator import ChainSimulator
+from day_boundaries import DayBoundaryResolver
+from eth_trading_patterns import EtherscanDataFetcher, fetch_transaction_data
+from http_transport import HttpTransport
+from rate_limiter import TokenBucket
+
+
+class LatencyRecorder:
+    """Times every HTTP attempt made through a transport's session"""
+
+    def __init__(self, transport):
+        self.samples = []
+        self._send = transport.session.request
+        transport.session.request = self._timed
+
+    def _timed(self, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return self._send(*args, **kwargs)
+        finally:
+            self.samples.append(time.perf_counter() - start)
+
+
+def _sequential(fetcher, dates, args):
+    """One day after another through get_daily_transaction_count"""
+    fetcher.rate_limiter = TokenBucket(args.rps, capacity=1)
+    return [row for row in (fetcher.get_daily_transaction_count(date) for date in dates) if row]
+
+
+def _concurrent(fetcher, dates, args):
+    """The main() fetch loop: all days through the async engine"""
+    return fetch_transaction_data(fetcher, dates, requests_per_second=args.rps,
+                                  max_concurrency=args.concurrency, progress=False)
+
+
+SCENARIOS = {'sequential': _sequential, 'concurrent': _concurrent}
+
+
+def run_scenario(name, simulator, dates, args, cache_dir):
+    """
+    Time one scenario against a fresh fetcher (and cache, if enabled)
+
+    Returns:
+    dict: Throughput and latency figures for the report
+    """
+    cache = BlockCache(os.path.join(cache_dir, f"{name}.sqlite")) if args.cache else None
+    transport = HttpTransport(pool_size=args.concurrency)
+    recorder = LatencyRecorder(transport)
+    fetcher = EtherscanDataFetcher('benchmark', cache=cache, transport=transport,
+                                   base_url=simulator.url, max_samples_per_day=args.max_samples)
+
+    served_before = simulator.requests
+    start = time.perf_counter()
+    rows = SCENARIOS[name](fetcher, dates, args)
+    wall = time.perf_counter() - start
+    if cache is not None:
+        cache.close()
+
+    latencies = np.array(recorder.samples) * 1000
+    return {
+        'scenario': name,
+        'days': len(rows),
+        'requests': len(latencies),
+        'server_requests': simulator.requests - served_before,
+        'wall_time_s': wall,
+        'requests_per_s': len(latencies) / wall if wall else 0.0,
+        'days_per_s': len(rows) / wall if wall else 0.0,
+        'latency_p50_ms': float(np.percentile(latencies, 50)) if len(latencies) else float('nan'),
+        'latency_p99_ms': float(np.percentile(latencies, 99)) if len(latencies) else float('nan'),
+    }
+
+
+def print_report(results, args):
+    print("\n" + "="*78)
+    print("FETCH BENCHMARK")
+    print(f"{args.days} days | latency {args.latency * 1000:.0f}±{args.jitter * 1000:.0f} ms | "
+          f"error rate {args.error_rate:.1%} | server limit {args.rate_limit or 'none'} rps | "
+          f"client {args.rps:g} rps x {args.concurrency}")
+    print("="*78)
+    print(f"{'scenario':<12}{'days':>6}{'requests':>10}{'req/s':>9}{'days/s':>9}"
+          f"{'p50 ms':>9}{'p99 ms':>9}{'wall s':>9}")
+    for r in results:
+        print(f"{r['scenario']:<12}{r['days']:>6}{r['requests']:>10}{r['requests_per_s']:>9.1f}"
+              f"{r['days_per_s']:>9.2f}{r['latency_p50_ms']:>9.1f}{r['latency_p99_ms']:>9.1f}"
+              f"{r['wall_time_s']:>9.2f}")
+    print("="*78 + "\n")
+
+
+def parse_args(argv=None):
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description="Benchmark the fetch path against a local Etherscan stand-in")
+    parser.add_argument('--scenarios', default='sequential,concurrent',
+                        help=f"Comma-separated subset of: {', '.join(SCENARIOS)}")
+    parser.add_argument('--start', type=lambda d: datetime.strptime(d, '%Y-%m-%d'),
+                        default=datetime(2025, 1, 1), help="First day to fetch (YYYY-MM-DD)")
+    parser.add_argument('--days', type=int, default=7, help="Number of days to fetch")
+    parser.add_argument('--latency', type=float, default=0.05, help="Server mean latency in seconds")
+    parser.add_argument('--jitter', type=float, default=0.02, help="Server latency standard deviation")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Share of requests failing with HTTP 500")
+    parser.add_argument('--rate-limit', type=int, help="Server-side requests per second limit")
+    parser.add_argument('--rps', type=float, default=20, help="Client requests per second budget")
+    parser.add_argument('--concurrency', type=int, default=8, help="Client requests in flight")
+    parser.add_argument('--max-samples', type=int, default=20, help="Block samples per day")
+    parser.add_argument('--cache', action='store_true', help="Use a fresh block cache per scenario")
+    parser.add_argument('--seed', type=int, default=0, help="Seed for server latency and errors")
+    parser.add_argument('--json', help="Also write the results to this JSON file")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Main execution function"""
+    args = parse_args(argv)
+    dates = DayBoundaryResolver.date_range(args.start, args.start + timedelta(days=args.days - 1))
+
+    results = []
+    with tempfile.TemporaryDirectory() as cache_dir:
+        for name in args.scenarios.split(','):
+            # A fresh server per scenario keeps rate-limit windows independent
+            with ChainSimulator(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                                rate_limit=args.rate_limit, seed=args.seed) as simulator:
+                print(f"Running {name}...")
+                results.append(run_scenario(name.strip(), simulator, dates, args, cache_dir))
+
+    print_report(results, args)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'config': {k: str(v) for k, v in vars(args).items()}, 'results': results},
+                      f, indent=2)
+        print(f"✓ Saved benchmark results: {args.json}\n")
+    return results
+
+
+if __name__ == "__main__":
+    main()
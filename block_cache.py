@@ -0,0 +1,258 @@
+"""
+Persistent Block Cache
+SQLite store for block lookups and per-block transaction counts, so re-runs only
+pay for blocks they have not seen before
+
+Author: Yuyan Kuang
+Date: January 2026
+"""
+
+import sqlite3
+import threading
+import time
+
+from block_record import RECORD_FIELDS
+
+# Blocks older than this are treated as final (two epochs is ~12.8 minutes)
+FINALITY_SECONDS = 15 * 60
+
+# Per-block metric columns added after tx_count/timestamp (see block_record.BlockRecord)
+METRIC_COLUMNS = {
+    'gas_used': 'INTEGER',
+    'gas_limit': 'INTEGER',
+    'base_fee_per_gas': 'INTEGER',
+    'blob_gas_used': 'INTEGER',
+    'excess_blob_gas': 'INTEGER',
+    'unique_senders': 'INTEGER',
+    'unique_recipients': 'INTEGER',
+    'value_eth': 'REAL',
+}
+
+
+class BlockCache:
+    """
+    On-disk cache keyed by (chainid, block number) and (chainid, timestamp, closest)
+
+    Finalized blocks never change, so anything stored here is reused forever.
+    A single connection is shared between threads behind a lock.
+    """
+
+    def __init__(self, path='outputs/block_cache.sqlite'):
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS blocks (
+                chainid TEXT NOT NULL,
+                block_number INTEGER NOT NULL,
+                tx_count INTEGER NOT NULL,
+                timestamp INTEGER,
+                PRIMARY KEY (chainid, block_number)
+            );
+            CREATE INDEX IF NOT EXISTS blocks_by_time ON blocks (chainid, timestamp);
+            CREATE TABLE IF NOT EXISTS block_by_timestamp (
+                chainid TEXT NOT NULL,
+                timestamp INTEGER NOT NULL,
+                closest TEXT NOT NULL,
+                block_number INTEGER NOT NULL,
+                PRIMARY KEY (chainid, timestamp, closest)
+            );
+        """)
+        # Caches written before per-block metrics existed get the new columns (NULL for old rows)
+        existing = {row[1] for row in self._conn.execute("PRAGMA table_info(blocks)")}
+        for column, kind in METRIC_COLUMNS.items():
+            if column not in existing:
+                self._conn.execute(f"ALTER TABLE blocks ADD COLUMN {column} {kind}")
+        self._conn.commit()
+
+    def _count(self, value):
+        """Record a hit or miss (caller holds the lock)"""
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def get_tx_counts(self, chainid, block_numbers, require=()):
+        """
+        Cached transaction counts for many blocks in one query
+
+        Parameters:
+        chainid (str): Chain the blocks belong to
+        block_numbers (iterable): Blocks to look up
+        require (tuple): METRIC_COLUMNS a row must have filled in to count as cached, so
+                         blocks stored before those metrics were collected are refetched
+
+        Returns:
+        dict: Block number -> transaction count, for the blocks found in the cache
+        """
+        block_numbers = list(block_numbers)
+        if not block_numbers:
+            return {}
+        unknown = set(require) - set(METRIC_COLUMNS)
+        if unknown:
+            raise ValueError(f"Unknown metric columns: {sorted(unknown)}")
+        filled = ''.join(f" AND {column} IS NOT NULL" for column in require)
+        wanted = set(block_numbers)
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT block_number, tx_count FROM blocks "
+                "WHERE chainid = ? AND block_number BETWEEN ? AND ?" + filled,
+                (str(chainid), min(wanted), max(wanted)),
+            ).fetchall()
+            counts = {block: tx for block, tx in rows if block in wanted}
+            self.hits += len(counts)
+            self.misses += len(wanted) - len(counts)
+        return counts
+
+    def iter_blocks(self, chainid, start_block=None, end_block=None, chunk_size=100_000):
+        """
+        Stream cached blocks in block order
+
+        Yields:
+        list: Chunks of (block_number, tx_count, timestamp) tuples
+        """
+        start_block = 0 if start_block is None else start_block
+        end_block = 2 ** 62 if end_block is None else end_block
+        while start_block <= end_block:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT block_number, tx_count, timestamp FROM blocks "
+                    "WHERE chainid = ? AND block_number BETWEEN ? AND ? "
+                    "ORDER BY block_number LIMIT ?",
+                    (str(chainid), start_block, end_block, chunk_size),
+                ).fetchall()
+            if not rows:
+                return
+            yield rows
+            start_block = rows[-1][0] + 1
+
+    def block_range(self, chainid):
+        """Lowest and highest cached block numbers, or None if nothing is cached"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT MIN(block_number), MAX(block_number) FROM blocks WHERE chainid = ?",
+                (str(chainid),),
+            ).fetchone()
+        return None if row[0] is None else tuple(row)
+
+    def block_totals(self, chainid):
+        """Number of cached blocks and their summed transaction counts"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(tx_count), 0) FROM blocks WHERE chainid = ?",
+                (str(chainid),),
+            ).fetchone()
+        return tuple(row)
+
+    def put_records(self, chainid, records):
+        """Store many BlockRecords (every metric column) in one transaction"""
+        cutoff = time.time() - FINALITY_SECONDS
+        rows = [(str(chainid), record.block_number) + tuple(record[1:]) for record in records
+                if record.timestamp is None or record.timestamp <= cutoff]
+        if not rows:
+            return
+        columns = ', '.join(RECORD_FIELDS)
+        placeholders = ', '.join('?' * (len(RECORD_FIELDS) + 2))
+        with self._lock:
+            self._conn.executemany(
+                f"INSERT OR REPLACE INTO blocks (chainid, block_number, {columns}) "
+                f"VALUES ({placeholders})",
+                rows,
+            )
+            self._conn.commit()
+
+    def count_filled(self, chainid, start_block, end_block, columns=()):
+        """Cached blocks in a range (inclusive) that have every one of `columns` filled in"""
+        unknown = set(columns) - set(METRIC_COLUMNS)
+        if unknown:
+            raise ValueError(f"Unknown metric columns: {sorted(unknown)}")
+        filled = ''.join(f" AND {column} IS NOT NULL" for column in columns)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT COUNT(*) FROM blocks WHERE chainid = ? AND block_number BETWEEN ? AND ?" + filled,
+                (str(chainid), start_block, end_block),
+            ).fetchone()
+        return row[0]
+
+    def range_metrics(self, chainid, start_block, end_block):
+        """
+        Aggregate the cached metrics of the blocks in a range (inclusive)
+
+        Returns:
+        dict: blocks (with metrics), per-block means of every metric, and
+              gas_used_sum / gas_limit_sum; means are None without data
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT COUNT(gas_used), AVG(gas_used), SUM(gas_used), SUM(gas_limit), "
+                "AVG(base_fee_per_gas), AVG(blob_gas_used), AVG(unique_senders), "
+                "AVG(unique_recipients), AVG(value_eth) "
+                "FROM blocks WHERE chainid = ? AND block_number BETWEEN ? AND ?",
+                (str(chainid), start_block, end_block),
+            ).fetchone()
+        keys = ('blocks', 'gas_used', 'gas_used_sum', 'gas_limit_sum', 'base_fee_per_gas',
+                'blob_gas_used', 'unique_senders', 'unique_recipients', 'value_eth')
+        return dict(zip(keys, row))
+
+    def get_timestamp_bracket(self, chainid, timestamp):
+        """
+        Nearest cached blocks on either side of a timestamp
+
+        Returns:
+        tuple: ((block, timestamp) of the last block before `timestamp`,
+                (block, timestamp) of the first block at or after it), or None
+        """
+        chainid = str(chainid)
+        with self._lock:
+            before = self._conn.execute(
+                "SELECT block_number, timestamp FROM blocks "
+                "WHERE chainid = ? AND timestamp < ? ORDER BY timestamp DESC LIMIT 1",
+                (chainid, timestamp),
+            ).fetchone()
+            after = self._conn.execute(
+                "SELECT block_number, timestamp FROM blocks "
+                "WHERE chainid = ? AND timestamp >= ? ORDER BY timestamp ASC LIMIT 1",
+                (chainid, timestamp),
+            ).fetchone()
+        if before is None or after is None:
+            return None
+        return tuple(before), tuple(after)
+
+    def get_block_by_timestamp(self, chainid, timestamp, closest):
+        """Cached getblocknobytime result, or None"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT block_number FROM block_by_timestamp "
+                "WHERE chainid = ? AND timestamp = ? AND closest = ?",
+                (str(chainid), timestamp, closest),
+            ).fetchone()
+            return self._count(row[0] if row else None)
+
+    def put_block_by_timestamp(self, chainid, timestamp, closest, block_number):
+        """Store a getblocknobytime result once the timestamp is final"""
+        if timestamp > time.time() - FINALITY_SECONDS:
+            return
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO block_by_timestamp (chainid, timestamp, closest, block_number) "
+                "VALUES (?, ?, ?, ?)",
+                (str(chainid), timestamp, closest, block_number),
+            )
+            self._conn.commit()
+
+    def report(self):
+        """Print cache hit/miss counts for this run"""
+        with self._lock:
+            hits, misses = self.hits, self.misses
+        total = hits + misses
+        hit_rate = (hits / total * 100) if total else 0.0
+        print(f"✓ Block cache: {hits:,} hits, {misses:,} misses ({hit_rate:.1f}% hit rate)")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
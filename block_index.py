@@ -0,0 +1,323 @@
+"""
+Block Index
+Memory-mapped per-block transaction counts and timestamps with prefix-sum sidecars, so
+any block-range or time-window total is read straight from disk without a scan
+
+Author: Yuyan Kuang
+Date: January 2026
+"""
+
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_ROOT = 'outputs/block_index'
+ARRAYS = {
+    'tx_count': np.uint32,      # transactions in each block
+    'timestamp': np.int64,      # block time; uncached blocks repeat the last cached time (search key only)
+    'tx_cumsum': np.int64,      # tx_cumsum[i] = transactions in the first i blocks
+    'known_cumsum': np.int32,   # known_cumsum[i] = cached blocks among the first i
+}
+
+
+class BlockIndex:
+    """
+    Per-chain block arrays indexed by block_number - first_block
+
+    The arrays are NumPy .npy files opened as read-only memory maps, so only
+    the pages a query touches are read. With the prefix sums a block-range
+    total is two lookups (O(1)); a time window first finds its blocks by
+    binary search over the timestamps (O(log n)). Blocks missing from the
+    cache count as zero transactions and are reported through `known`. Time
+    buckets are only complete when every block in them is cached and the
+    cache pins down the first block at or after each edge (see
+    bucket_totals), so gaps are never mistaken for quiet periods.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, 'meta.json')) as f:
+            self.meta = json.load(f)
+        self.chainid = self.meta['chainid']
+        self.first_block = self.meta['first_block']
+        self.last_block = self.meta['last_block']
+        self.min_block_interval = self.meta.get('min_block_interval', 0)
+        for name in ARRAYS:
+            setattr(self, name, np.load(os.path.join(path, f'{name}.npy'), mmap_mode='r'))
+
+    def __len__(self):
+        return self.last_block - self.first_block + 1
+
+    @staticmethod
+    def chain_path(root, chainid):
+        return os.path.join(root, f'chain{chainid}')
+
+    @classmethod
+    def build(cls, cache, chainid='1', root=DEFAULT_ROOT, chunk_size=1_000_000):
+        """
+        Write the index for every block of a chain stored in a BlockCache
+
+        Blocks are streamed from the cache and the prefix sums are computed in
+        chunks, so memory use stays at one chunk however long the chain is.
+        Files are written under temporary names and swapped in at the end.
+
+        Returns:
+        BlockIndex: The freshly built index
+        """
+        span = cache.block_range(chainid)
+        if span is None:
+            raise ValueError(f"No cached blocks for chain {chainid}")
+        first_block, last_block = span
+        n = last_block - first_block + 1
+        path = cls.chain_path(root, chainid)
+        os.makedirs(path, exist_ok=True)
+
+        # New .npy memmaps are zero-filled; known_cumsum[i + 1] holds a 0/1 flag until the final pass
+        shapes = {'tx_count': n, 'timestamp': n, 'tx_cumsum': n + 1, 'known_cumsum': n + 1}
+        arrays = {name: np.lib.format.open_memmap(os.path.join(path, f'{name}.tmp.npy'), mode='w+',
+                                                  dtype=dtype, shape=(shapes[name],))
+                  for name, dtype in ARRAYS.items()}
+        tx, ts, tx_cum, known = (arrays[name] for name in ARRAYS)
+
+        for rows in cache.iter_blocks(chainid, first_block, last_block, chunk_size=chunk_size):
+            block = np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows)) - first_block
+            tx[block] = np.fromiter((row[1] for row in rows), dtype=np.int64, count=len(rows))
+            ts[block] = np.fromiter((row[2] or 0 for row in rows), dtype=np.int64, count=len(rows))
+            known[block + 1] = 1
+
+        last_ts = last_tx = last_known = 0
+        min_interval = None
+        for start in range(0, n, chunk_size):
+            end = min(start + chunk_size, n)
+            # Shortest gap between consecutive cached blocks (12 s on post-merge Ethereum)
+            flags = known[start + 1:end + 1].astype(bool)
+            gaps = np.diff(ts[start:end])[flags[1:] & flags[:-1]]
+            if len(gaps):
+                min_interval = int(gaps.min()) if min_interval is None else min(min_interval, int(gaps.min()))
+            # Uncached blocks take the last cached time so the array stays sorted for
+            # searchsorted; bucket_totals uses the known flags, not these values
+            ts[start:end] = np.maximum.accumulate(np.maximum(ts[start:end], last_ts))
+            tx_cum[start + 1:end + 1] = np.cumsum(tx[start:end], dtype=np.int64) + last_tx
+            known[start + 1:end + 1] = np.cumsum(known[start + 1:end + 1], dtype=np.int64) + last_known
+            last_ts, last_tx, last_known = int(ts[end - 1]), int(tx_cum[end]), int(known[end])
+
+        for array in arrays.values():
+            array.flush()
+        del arrays, tx, ts, tx_cum, known
+        for name in ARRAYS:
+            os.replace(os.path.join(path, f'{name}.tmp.npy'), os.path.join(path, f'{name}.npy'))
+
+        meta = {'chainid': str(chainid), 'first_block': first_block, 'last_block': last_block,
+                'blocks_known': last_known, 'transactions': last_tx,
+                'min_block_interval': min_interval or 0, 'built_at': int(time.time())}
+        with open(os.path.join(path, 'meta.json'), 'w') as f:
+            json.dump(meta, f, indent=2)
+        return cls(path)
+
+    @classmethod
+    def open(cls, cache, chainid='1', root=DEFAULT_ROOT, rebuild=False):
+        """
+        Open the index for a chain, (re)building it if the cache holds other blocks
+
+        The index is reused only if the cache has the same first and last block,
+        the same number of blocks and the same transaction total, so filling a
+        gap inside the indexed span also triggers a rebuild.
+        """
+        path = cls.chain_path(root, chainid)
+        if not rebuild and os.path.exists(os.path.join(path, 'meta.json')):
+            index = cls(path)
+            if cache is None:
+                return index
+            indexed = (index.first_block, index.last_block,
+                       index.meta['blocks_known'], index.meta['transactions'])
+            if cache.block_range(chainid) + cache.block_totals(chainid) == indexed:
+                return index
+        return cls.build(cache, chainid, root)
+
+    def _offset(self, block_num):
+        if not self.first_block <= block_num <= self.last_block:
+            raise KeyError(f"Block {block_num} is outside the index "
+                           f"({self.first_block}-{self.last_block})")
+        return block_num - self.first_block
+
+    def range_total(self, start_block, end_block):
+        """
+        Transactions from start_block to end_block (inclusive) in O(1)
+
+        Returns:
+        tuple: (transaction total, number of those blocks present in the cache)
+        """
+        start, end = self._offset(start_block), self._offset(end_block) + 1
+        return (int(self.tx_cumsum[end] - self.tx_cumsum[start]),
+                int(self.known_cumsum[end] - self.known_cumsum[start]))
+
+    def block_at(self, timestamp):
+        """First indexed block with a timestamp at or after `timestamp`"""
+        return self.first_block + int(np.searchsorted(self.timestamp, timestamp, side='left'))
+
+    def window_total(self, start_timestamp, end_timestamp):
+        """Transactions in blocks with start_timestamp <= time < end_timestamp"""
+        start, end = np.searchsorted(self.timestamp, [start_timestamp, end_timestamp], side='left')
+        return (int(self.tx_cumsum[end] - self.tx_cumsum[start]),
+                int(self.known_cumsum[end] - self.known_cumsum[start]))
+
+    def _edge_blocks(self, edges):
+        """
+        Offset of the first block at or after each edge, and whether the cache proves it
+
+        Let a be the last cached block before an edge and b the first cached
+        block at or after it. If a and b are adjacent the boundary is b. If
+        uncached blocks lie between them, the boundary is still known when the
+        edge is within min_block_interval of a (a + 1 cannot be earlier) or of
+        b (b - 1 cannot be later); otherwise the edge falls inside the gap.
+        The first and last indexed blocks are treated the same way against the
+        unindexed blocks around them.
+
+        Returns:
+        tuple: (offsets, proven) arrays, one entry per edge
+        """
+        n = len(self)
+        step = self.min_block_interval
+        # Uncached blocks carry the time of the cached block before them, so this is b (or n)
+        b = np.searchsorted(self.timestamp, edges, side='left')
+        # a + 1: first offset whose known prefix count equals the count before b
+        after_a = np.searchsorted(self.known_cumsum, np.asarray(self.known_cumsum[b]), side='left')
+        ts_a = np.asarray(self.timestamp[np.maximum(b - 1, 0)], dtype=np.int64)
+        ts_b = np.asarray(self.timestamp[np.minimum(b, n - 1)], dtype=np.int64)
+
+        gap = after_a < b
+        near_a = gap & (edges <= ts_a + step)
+        offsets = np.where(near_a, after_a, b)
+        proven = np.where(
+            b == 0, edges > ts_b - step,
+            np.where(b == n, edges <= ts_a + step,
+                     ~gap | near_a | (edges > ts_b - step)))
+        return offsets, proven
+
+    def bucket_totals(self, edges):
+        """
+        Totals for consecutive time buckets [edges[i], edges[i + 1])
+
+        Parameters:
+        edges (array): Increasing unix timestamps
+
+        Returns:
+        DataFrame: start, end, tx_count, blocks, known, start_block, end_block and
+        complete (both edges are pinned down by cached blocks, the bucket has
+        blocks and every one of them is cached)
+        """
+        edges = np.asarray(edges, dtype=np.int64)
+        idx, proven = self._edge_blocks(edges)
+        tx = np.asarray(self.tx_cumsum[idx], dtype=np.int64)
+        known = np.diff(np.asarray(self.known_cumsum[idx], dtype=np.int64))
+        blocks = np.diff(idx)
+        return pd.DataFrame({
+            'start': edges[:-1],
+            'end': edges[1:],
+            'tx_count': np.diff(tx),
+            'blocks': blocks,
+            'known': known,
+            'start_block': self.first_block + idx[:-1],
+            'end_block': self.first_block + idx[1:] - 1,
+            'complete': proven[:-1] & proven[1:] & (blocks > 0) & (known == blocks),
+        })
+
+    def _span(self, tz):
+        """First and last indexed block times as local timestamps"""
+        first, last = int(self.timestamp[0]), int(self.timestamp[-1])
+        return (pd.Timestamp(first, unit='s', tz='UTC').tz_convert(tz),
+                pd.Timestamp(last, unit='s', tz='UTC').tz_convert(tz))
+
+    def daily_frame(self, tz='UTC', complete_only=True):
+        """
+        Calendar-day totals in any timezone, in the daily dataset's columns
+
+        Returns:
+        DataFrame: date, tx_count, tx_count_se (0: exact), start_block, end_block, blocks
+        """
+        first, last = self._span(tz)
+        midnights = pd.date_range(first.tz_localize(None).normalize(),
+                                  last.tz_localize(None).normalize() + pd.Timedelta(days=1), freq='D')
+        local = midnights.tz_localize(tz, ambiguous='NaT', nonexistent='shift_forward').dropna()
+        buckets = self.bucket_totals((local.tz_convert('UTC').tz_localize(None) - pd.Timestamp(0))
+                                     // pd.Timedelta(seconds=1))
+        buckets['date'] = local[:-1].strftime('%Y-%m-%d')
+        if complete_only:
+            buckets = buckets[buckets['complete']]
+        buckets = buckets.assign(tx_count_se=0.0)
+        return buckets[['date', 'tx_count', 'tx_count_se', 'start_block', 'end_block', 'blocks']] \
+            .reset_index(drop=True)
+
+    def hourly_frame(self, tz='UTC', complete_only=True):
+        """
+        Local clock-hour totals in any timezone
+
+        Returns:
+        DataFrame: hour (local wall time), tx_count, blocks
+        """
+        first, last = self._span(tz)
+        # Local hours start at the UTC offset's minutes past each UTC hour (e.g. :30 in India)
+        shift = int(first.utcoffset().total_seconds()) % 3600
+        start = (int(self.timestamp[0]) - shift) // 3600 * 3600 + shift
+        edges = np.arange(start, int(self.timestamp[-1]) + 3600, 3600, dtype=np.int64)
+        buckets = self.bucket_totals(edges)
+        if complete_only:
+            buckets = buckets[buckets['complete']]
+        hours = pd.to_datetime(buckets['start'], unit='s', utc=True).dt.tz_convert(tz).dt.tz_localize(None)
+        return pd.DataFrame({'hour': hours.values, 'tx_count': buckets['tx_count'].values,
+                             'blocks': buckets['blocks'].values})
+
+    def report(self):
+        known = int(self.known_cumsum[-1])
+        print(f"✓ Block index chain {self.chainid}: blocks {self.first_block:,}-{self.last_block:,} "
+              f"({known:,} of {len(self):,} cached, {int(self.tx_cumsum[-1]):,} transactions)")
+
+
+def parse_args(argv=None):
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description="Build a block index from the block cache and re-bucket it")
+    parser.add_argument('--cache', default='outputs/block_cache.sqlite', help="SQLite block cache to index")
+    parser.add_argument('--chainid', default='1')
+    parser.add_argument('--root', default=DEFAULT_ROOT, help="Directory holding the per-chain index")
+    parser.add_argument('--rebuild', action='store_true', help="Rebuild even if the index looks current")
+    parser.add_argument('--tz', default='UTC', help="Timezone for calendar days, e.g. America/New_York")
+    parser.add_argument('--resolution', choices=['daily', 'hourly'], default='daily')
+    parser.add_argument('--output', help="Write the re-bucketed dataset to this CSV")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Index the cached blocks and run the weekend analysis on local days or hours"""
+    from block_cache import BlockCache
+    from eth_trading_patterns import TradingPatternAnalyzer, save_dataset
+
+    args = parse_args(argv)
+    cache = BlockCache(args.cache)
+    started = time.perf_counter()
+    index = BlockIndex.open(cache, args.chainid, args.root, rebuild=args.rebuild)
+    cache.close()
+    index.report()
+    print(f"  ready in {time.perf_counter() - started:.2f}s")
+
+    started = time.perf_counter()
+    if args.resolution == 'daily':
+        frame = index.daily_frame(args.tz)
+    else:
+        frame = index.hourly_frame(args.tz)
+    print(f"✓ Re-bucketed into {len(frame):,} {args.tz} "
+          f"{'days' if args.resolution == 'daily' else 'hours'} in {time.perf_counter() - started:.3f}s")
+    if args.output:
+        save_dataset(frame, args.output)
+        print(f"✓ Saved {args.output}")
+
+    analyzer = TradingPatternAnalyzer(frame, resolution=args.resolution, tz=args.tz)
+    analyzer.analyze_weekend_effect()
+    analyzer.analyze_day_of_week_effect()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Block Records
+Every per-block metric that can be read from one eth_getBlockByNumber payload, so
+gas, fees, blob usage and addresses come at no extra API cost
+
+Author: Yuyan Kuang
+Date: January 2026
+"""
+
+from collections import namedtuple
+
+# Per-block columns stored in the BlockCache after block_number
+RECORD_FIELDS = ('tx_count', 'timestamp', 'gas_used', 'gas_limit', 'base_fee_per_gas',
+                 'blob_gas_used', 'excess_blob_gas', 'unique_senders', 'unique_recipients',
+                 'value_eth')
+
+# Daily columns derived from the cached blocks of each day (see BlockCache.range_metrics)
+DAY_METRIC_COLUMNS = ('gas_used', 'gas_utilization', 'base_fee_gwei', 'blob_gas_used',
+                      'senders_per_block', 'recipients_per_block', 'value_eth')
+
+WEI_PER_ETH = 10 ** 18
+WEI_PER_GWEI = 10 ** 9
+
+
+def _hex(value):
+    return int(value, 16) if value else None
+
+
+class BlockRecord(namedtuple('BlockRecord', ('block_number',) + RECORD_FIELDS)):
+    """
+    One block's metrics
+
+    Fields:
+    block_number (int), timestamp (int, unix seconds), tx_count (int),
+    gas_used (int), gas_limit (int), base_fee_per_gas (int, wei; None before London),
+    blob_gas_used and excess_blob_gas (int; None before Dencun),
+    unique_senders and unique_recipients (int; None unless full transactions were fetched),
+    value_eth (float; None unless full transactions were fetched)
+    """
+
+    __slots__ = ()
+
+    @classmethod
+    def from_block(cls, block_num, block, full_transactions=False):
+        """
+        Parse a block object from eth_getBlockByNumber
+
+        Parameters:
+        block_num (int): Block number that was requested
+        block (dict): JSON-RPC block object with hex-encoded quantities
+        full_transactions (bool): The block was requested with full transaction objects
+        """
+        transactions = block.get('transactions', [])
+        senders = recipients = value_eth = None
+        if full_transactions and all(isinstance(tx, dict) for tx in transactions):
+            senders = len({tx.get('from') for tx in transactions})
+            # Contract creations have no recipient
+            recipients = len({tx['to'] for tx in transactions if tx.get('to')})
+            value_eth = sum(int(tx.get('value') or '0x0', 16) for tx in transactions) / WEI_PER_ETH
+
+        return cls(
+            block_number=block_num,
+            tx_count=len(transactions),
+            timestamp=_hex(block.get('timestamp')),
+            gas_used=_hex(block.get('gasUsed')),
+            gas_limit=_hex(block.get('gasLimit')),
+            base_fee_per_gas=_hex(block.get('baseFeePerGas')),
+            blob_gas_used=_hex(block.get('blobGasUsed')),
+            excess_blob_gas=_hex(block.get('excessBlobGas')),
+            unique_senders=senders,
+            unique_recipients=recipients,
+            value_eth=value_eth,
+        )
+
+
+def day_metrics(aggregates, n_blocks):
+    """
+    Daily metric columns from BlockCache.range_metrics aggregates
+
+    Per-block means are scaled by the number of blocks in the day, so the
+    totals are exact when every block was fetched (--exact) and estimates
+    from the sampled blocks otherwise.
+
+    Parameters:
+    aggregates (dict): Output of BlockCache.range_metrics for the day's blocks
+    n_blocks (int): Blocks in the day (end_block - start_block + 1)
+
+    Returns:
+    dict: The DAY_METRIC_COLUMNS plus metric_blocks (blocks the metrics come from)
+    """
+    def scaled(mean, factor):
+        return None if mean is None else mean * factor
+
+    used, limit = aggregates['gas_used_sum'], aggregates['gas_limit_sum']
+    return {
+        'gas_used': scaled(aggregates['gas_used'], n_blocks),
+        'gas_utilization': used / limit if used is not None and limit else None,
+        'base_fee_gwei': scaled(aggregates['base_fee_per_gas'], 1 / WEI_PER_GWEI),
+        'blob_gas_used': scaled(aggregates['blob_gas_used'], n_blocks),
+        'senders_per_block': aggregates['unique_senders'],
+        'recipients_per_block': aggregates['unique_recipients'],
+        'value_eth': scaled(aggregates['value_eth'], n_blocks),
+        'metric_blocks': aggregates['blocks'],
+    }
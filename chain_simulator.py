@@ -0,0 +1,355 @@
+"""
+Synthetic Chain Simulator
+Local HTTP server that stands in for the Etherscan v2 API and an Ethereum JSON-RPC
+node, serving a deterministic synthetic chain with configurable block times,
+weekday/weekend activity, latency, errors and API quotas
+
+Author: Yuyan Kuang
+Date: January 2026
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+GENESIS_TIMESTAMP = 1438269973  # Ethereum mainnet genesis, 2015-07-30 15:26:13 UTC
+BLOCK_TIME = 12
+# Relative activity Monday..Sunday
+WEEKDAY_WEEKEND_PROFILE = (1.0, 1.0, 1.0, 1.0, 1.0, 0.85, 0.85)
+GAS_LIMIT = 36_000_000
+BLOB_GAS_PER_BLOB = 131_072
+
+
+class SyntheticChain:
+    """
+    Deterministic chain with a weekly and daily activity pattern
+
+    Slots are `block_time` seconds apart from genesis. With
+    missed_slot_every=k every k-th slot has no block, which produces the
+    irregular timestamp gaps of a real proof-of-stake chain. A block's
+    transaction count is mean_tx scaled by its day's entry in `day_profile`
+    (Monday first) and a daily cycle peaking at `peak_hour` UTC, plus
+    noise derived from a hash of the block number, so every run and every
+    process sees the same chain.
+    """
+
+    def __init__(self, genesis_timestamp=GENESIS_TIMESTAMP, block_time=BLOCK_TIME,
+                 missed_slot_every=0, mean_tx=150, noise=0.3, day_profile=WEEKDAY_WEEKEND_PROFILE,
+                 daily_amplitude=0.2, peak_hour=15):
+        self.genesis_timestamp = genesis_timestamp
+        self.block_time = block_time
+        self.missed_slot_every = missed_slot_every
+        self.mean_tx = mean_tx
+        self.noise = noise
+        self.day_profile = tuple(day_profile)
+        self.daily_amplitude = daily_amplitude
+        self.peak_hour = peak_hour
+
+    def _slot(self, block_num):
+        """Slot of a block, skipping every missed_slot_every-th slot"""
+        k = self.missed_slot_every
+        return block_num + block_num // (k - 1) if k > 1 else block_num
+
+    def block_timestamp(self, block_num):
+        return self.genesis_timestamp + self._slot(block_num) * self.block_time
+
+    def block_by_timestamp(self, timestamp, closest='before'):
+        """Last block at or before (or first at or after) a timestamp"""
+        if timestamp < self.genesis_timestamp:
+            return 0
+        # Binary search: block timestamps are strictly increasing
+        lo, hi = 0, (timestamp - self.genesis_timestamp) // self.block_time + 1
+        while lo < hi:
+            mid = (lo + hi + 1) // 2
+            if self.block_timestamp(mid) <= timestamp:
+                lo = mid
+            else:
+                hi = mid - 1
+        if closest == 'after' and self.block_timestamp(lo) < timestamp:
+            return lo + 1
+        return lo
+
+    def head(self, now=None):
+        """Latest block produced by wall-clock time `now`"""
+        return self.block_by_timestamp(int(time.time() if now is None else now))
+
+    def activity(self, timestamp):
+        """Expected activity multiplier at a timestamp"""
+        day = (timestamp // 86400 + 3) % 7  # 1970-01-01 was a Thursday
+        hour = (timestamp % 86400) / 3600
+        cycle = 1 + self.daily_amplitude * math.cos(2 * math.pi * (hour - self.peak_hour) / 24)
+        return self.day_profile[day] * cycle
+
+    def tx_count(self, block_num):
+        digest = hashlib.blake2b(str(block_num).encode(), digest_size=4).digest()
+        u = int.from_bytes(digest, 'big') / 2 ** 32
+        expected = self.mean_tx * self.activity(self.block_timestamp(block_num))
+        return max(0, round(expected * (1 + self.noise * (2 * u - 1))))
+
+    def block(self, block_num, full_transactions=False):
+        """
+        Block object as returned by eth_getBlockByNumber
+
+        Gas used tracks the transaction count, the base fee tracks activity and
+        every block carries 0-5 blobs; with full_transactions the transactions
+        are objects whose senders repeat (a few active accounts per block).
+        """
+        tx_count = self.tx_count(block_num)
+        timestamp = self.block_timestamp(block_num)
+        hashes = [f"0x{block_num:032x}{i:032x}" for i in range(tx_count)]
+        if full_transactions:
+            transactions = [{
+                'hash': tx_hash,
+                'from': f"0x{(block_num * 7 + i) % max(1, tx_count // 3) + 1:040x}",
+                'to': f"0x{(block_num * 13 + i * 31) % 100_000 + 1:040x}" if i % 20 else None,
+                'value': hex(10 ** 16 * (i % 50)),
+            } for i, tx_hash in enumerate(hashes)]
+        else:
+            transactions = hashes
+        return {
+            'number': hex(block_num),
+            'timestamp': hex(timestamp),
+            'gasUsed': hex(min(GAS_LIMIT, tx_count * 80_000)),
+            'gasLimit': hex(GAS_LIMIT),
+            'baseFeePerGas': hex(int(5 * 10 ** 9 * self.activity(timestamp) ** 4)),
+            'blobGasUsed': hex(BLOB_GAS_PER_BLOB * (block_num % 6)),
+            'excessBlobGas': hex(0),
+            'transactions': transactions,
+        }
+
+    def eth_price(self, timestamp):
+        """Deterministic ETH/USD and ETH/BTC quote for a timestamp"""
+        day = timestamp // 86400
+        ethusd = 2500 + 500 * math.sin(day / 30)
+        return {'ethbtc': f"{ethusd / 60000:.5f}", 'ethbtc_timestamp': str(timestamp),
+                'ethusd': f"{ethusd:.2f}", 'ethusd_timestamp': str(timestamp)}
+
+
+class ChainSimulator:
+    """
+    Threaded HTTP server speaking the Etherscan v2 calls this project uses
+    and standard JSON-RPC
+
+    GET (Etherscan v2): block/getblocknobytime, proxy/eth_getBlockByNumber,
+    proxy/eth_blockNumber, stats/ethprice, stats/ethsupply.
+    POST (JSON-RPC, single or batch): eth_getBlockByNumber, eth_blockNumber,
+    eth_chainId.
+
+    Every request sleeps for a random latency and fails with HTTP 500 at
+    `error_rate`. Quotas are enforced per API key like Etherscan's: more
+    than `rate_limit` calls in a second or `daily_quota` calls in total get
+    the "Max ... rate limit reached" body, and keys outside `api_keys` (when
+    given) get "Invalid API Key".
+
+    Use as a context manager; `url` is the Etherscan endpoint to pass as
+    base_url and `rpc_url` the JSON-RPC endpoint.
+    """
+
+    def __init__(self, chain=None, latency=0.05, jitter=0.02, error_rate=0.0, rate_limit=None,
+                 daily_quota=None, api_keys=None, host='127.0.0.1', port=0, seed=0):
+        self.chain = chain or SyntheticChain()
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit
+        self.daily_quota = daily_quota
+        self.api_keys = set(api_keys) if api_keys else None
+        self.requests = 0
+        self.errors = 0
+        self.rate_limited = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._windows = {}  # api key -> [window start, calls in window]
+        self._usage = {}    # api key -> calls in total
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v2/api"
+
+    @property
+    def rpc_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/rpc"
+
+    def _handler_class(self):
+        simulator = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'  # keep-alive, like the real API
+
+            def _reply(self, status, body):
+                payload = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def do_GET(self):
+                self._reply(*simulator.handle(parse_qs(urlparse(self.path).query)))
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length', 0))
+                try:
+                    payload = json.loads(self.rfile.read(length))
+                except ValueError:
+                    self._reply(400, {'jsonrpc': '2.0', 'id': None,
+                                      'error': {'code': -32700, 'message': 'Parse error'}})
+                    return
+                self._reply(*simulator.handle_rpc(payload))
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def _admit(self, api_key, check_key=True):
+        """Decide the fate of one request: ('ok', delay), ('error', 0) or (limit message, 0)"""
+        with self._lock:
+            self.requests += 1
+            if check_key and self.api_keys is not None and api_key not in self.api_keys:
+                return 'Invalid API Key', 0
+            usage = self._usage.get(api_key, 0) + 1
+            self._usage[api_key] = usage
+            if self.daily_quota and usage > self.daily_quota:
+                self.rate_limited += 1
+                return 'Max daily rate limit reached', 0
+            if self.rate_limit:
+                now = time.monotonic()
+                window = self._windows.setdefault(api_key, [now, 0])
+                if now - window[0] >= 1:
+                    window[0], window[1] = now, 0
+                window[1] += 1
+                if window[1] > self.rate_limit:
+                    self.rate_limited += 1
+                    return f"Max calls per sec rate limit reached ({self.rate_limit}/sec)", 0
+            if self._random.random() < self.error_rate:
+                self.errors += 1
+                return 'error', 0
+            return 'ok', max(0.0, self._random.gauss(self.latency, self.jitter))
+
+    def handle(self, query):
+        """Answer one Etherscan v2 call; returns (HTTP status, JSON body)"""
+        params = {key: values[0] for key, values in query.items()}
+        outcome, delay = self._admit(params.get('apikey'))
+        if outcome == 'error':
+            return 500, {'status': '0', 'message': 'Internal Server Error'}
+        if outcome != 'ok':
+            return 200, {'status': '0', 'message': 'NOTOK', 'result': outcome}
+        time.sleep(delay)
+
+        module, action = params.get('module'), params.get('action')
+        if module == 'block' and action == 'getblocknobytime':
+            block_num = self.chain.block_by_timestamp(int(params['timestamp']),
+                                                      params.get('closest', 'before'))
+            return 200, {'status': '1', 'message': 'OK', 'result': str(block_num)}
+        if module == 'proxy' and action in ('eth_getBlockByNumber', 'eth_blockNumber'):
+            return 200, {'jsonrpc': '2.0', 'id': 1,
+                         'result': self._rpc_result(action, [params.get('tag'),
+                                                             params.get('boolean') == 'true'])}
+        if module == 'stats' and action == 'ethprice':
+            return 200, {'status': '1', 'message': 'OK', 'result': self.chain.eth_price(int(time.time()))}
+        if module == 'stats' and action == 'ethsupply':
+            return 200, {'status': '1', 'message': 'OK', 'result': str(120_000_000 * 10 ** 18)}
+        return 200, {'status': '0', 'message': 'NOTOK', 'result': f"Unsupported call {module}/{action}"}
+
+    def _rpc_result(self, method, params):
+        head = self.chain.head()
+        if method == 'eth_blockNumber':
+            return hex(head)
+        if method == 'eth_chainId':
+            return hex(1)
+        if method == 'eth_getBlockByNumber':
+            tag = params[0] if params else 'latest'
+            block_num = head if tag in (None, 'latest') else int(tag, 16)
+            full_transactions = bool(params[1]) if len(params) > 1 else False
+            return self.chain.block(block_num, full_transactions) if block_num <= head else None
+        raise KeyError(method)
+
+    def handle_rpc(self, payload):
+        """Answer a JSON-RPC request or batch; the whole POST counts as one call"""
+        # A node has no API keys; all JSON-RPC traffic shares one quota
+        outcome, delay = self._admit('json-rpc', check_key=False)
+        if outcome == 'error':
+            return 500, {'jsonrpc': '2.0', 'id': None, 'error': {'code': -32603, 'message': 'Internal error'}}
+        if outcome != 'ok':
+            return 429, {'jsonrpc': '2.0', 'id': None, 'error': {'code': -32005, 'message': outcome}}
+        time.sleep(delay)
+
+        def answer(call):
+            try:
+                return {'jsonrpc': '2.0', 'id': call.get('id'),
+                        'result': self._rpc_result(call.get('method'), call.get('params', []))}
+            except KeyError:
+                return {'jsonrpc': '2.0', 'id': call.get('id'),
+                        'error': {'code': -32601, 'message': 'Method not found'}}
+
+        if isinstance(payload, list):
+            return 200, [answer(call) for call in payload]
+        return 200, answer(payload)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def parse_args(argv=None):
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description="Run a local synthetic Etherscan v2 / JSON-RPC stand-in")
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--block-time', type=int, default=BLOCK_TIME, help="Seconds per slot")
+    parser.add_argument('--missed-slot-every', type=int, default=0,
+                        help="Leave every N-th slot empty (0: no missed slots)")
+    parser.add_argument('--mean-tx', type=int, default=150, help="Mean transactions per block")
+    parser.add_argument('--weekend-factor', type=float, default=0.85,
+                        help="Weekend activity relative to weekdays")
+    parser.add_argument('--latency', type=float, default=0.05, help="Mean response latency in seconds")
+    parser.add_argument('--jitter', type=float, default=0.02, help="Latency standard deviation in seconds")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Fraction of requests answered with HTTP 500")
+    parser.add_argument('--rate-limit', type=int, help="Calls per second per API key")
+    parser.add_argument('--daily-quota', type=int, help="Calls in total per API key")
+    parser.add_argument('--api-key', action='append', help="Accepted API key (repeatable; default: any)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    chain = SyntheticChain(block_time=args.block_time, missed_slot_every=args.missed_slot_every,
+                           mean_tx=args.mean_tx, day_profile=(1.0,) * 5 + (args.weekend_factor,) * 2)
+    simulator = ChainSimulator(chain, latency=args.latency, jitter=args.jitter,
+                               error_rate=args.error_rate, rate_limit=args.rate_limit,
+                               daily_quota=args.daily_quota, api_keys=args.api_key, port=args.port)
+    print(f"Synthetic Etherscan v2 API at {simulator.url}")
+    print(f"Synthetic JSON-RPC node at   {simulator.rpc_url}")
+    print(f"Point the scripts at it with ETHERSCAN_BASE_URL={simulator.url} (Ctrl+C to stop)")
+    simulator.start()
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        simulator.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+Day Boundary Index
+Resolves the block range of every day in a date range from one lookup per boundary
+
+Author: Yuyan Kuang
+Date: January 2026
+"""
+
+import threading
+from datetime import timedelta
+
+# Chains with a fixed slot length, as chainid -> (slot seconds, first unix time the slots
+# apply from). Post-merge Ethereum produces at most one block per 12-second slot from
+# the merge (block 15,537,394, 2022-09-15 06:42:59 UTC); before it block gaps varied.
+# Other chains are not interpolated.
+SLOT_SECONDS = {
+    '1': (12, 1663224179),
+}
+
+
+class DayBoundaryResolver:
+    """
+    Computes (start_block, end_block) for consecutive days in one pass
+
+    Day N ends exactly one block before day N+1 starts, so a range of D days
+    has only D+1 boundaries: the first block at or after each midnight. Each
+    boundary costs at most one getblocknobytime call, and none at all when the
+    block cache already holds timestamps on both sides of it.
+    """
+
+    def __init__(self, fetcher, interpolate=True):
+        self.fetcher = fetcher
+        self.interpolate = interpolate
+        self.api_lookups = 0
+        self.local_lookups = 0
+        # Boundaries are resolved from several worker threads at once
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def date_range(start_date, end_date):
+        """Every date from start_date to end_date (inclusive)"""
+        dates = []
+        current_date = start_date
+        while current_date <= end_date:
+            dates.append(current_date)
+            current_date += timedelta(days=1)
+        return dates
+
+    def day_starts(self, dates):
+        """Each date plus the day after it, whose midnights are the boundaries"""
+        starts = set(dates)
+        starts.update(d + timedelta(days=1) for d in dates)
+        return sorted(starts)
+
+    def boundary_timestamps(self, dates):
+        """Unix timestamps of the midnights bounding the given days (D+1 for a contiguous range)"""
+        return [self.fetcher._day_timestamps(d)[0] for d in self.day_starts(dates)]
+
+    def resolve_boundary(self, timestamp):
+        """First block with a timestamp at or after `timestamp`"""
+        if self.interpolate:
+            block_num = self._resolve_locally(timestamp)
+            if block_num is not None:
+                with self._lock:
+                    self.local_lookups += 1
+                return block_num
+
+        with self._lock:
+            self.api_lookups += 1
+        return self.fetcher._get_block_by_timestamp(timestamp, 'after')
+
+    def _resolve_locally(self, timestamp):
+        """
+        Find the boundary from cached block timestamps without an API call
+
+        Looks up the nearest cached blocks on either side of the timestamp.
+        Adjacent blocks give the boundary directly. On a chain in SLOT_SECONDS,
+        past the time its slots apply from, a timestamp gap of exactly one slot
+        per block means no slot in between was missed and the boundary block
+        can be interpolated; anywhere else a gap could match by coincidence, so
+        the API is asked instead.
+        """
+        cache = self.fetcher.cache
+        if cache is None:
+            return None
+
+        bracket = cache.get_timestamp_bracket(self.fetcher.chainid, timestamp)
+        if bracket is None:
+            return None
+
+        (lo_block, lo_time), (hi_block, hi_time) = bracket
+        if hi_block - lo_block == 1:
+            return hi_block
+        slot_seconds, slots_from = SLOT_SECONDS.get(str(self.fetcher.chainid), (None, None))
+        if slot_seconds is None or lo_time < slots_from:
+            return None
+        if hi_time - lo_time != slot_seconds * (hi_block - lo_block):
+            return None
+        return lo_block + -(-(timestamp - lo_time) // slot_seconds)
+
+    def day_ranges(self, dates, boundaries):
+        """
+        Pair each date with its block range
+
+        Parameters:
+        dates (list): Days to build ranges for
+        boundaries (dict): First block of each day in day_starts(dates) (None if unresolved)
+
+        Returns:
+        list: (date, start_block, end_block) for every day whose range is known
+        """
+        ranges = []
+        for date in sorted(dates):
+            start_block = boundaries.get(date)
+            next_start = boundaries.get(date + timedelta(days=1))
+            if start_block and next_start:
+                ranges.append((date, start_block, next_start - 1))
+        return ranges
+
+    def resolve(self, dates):
+        """Sequentially resolve block ranges for the given days"""
+        boundaries = {d: self.resolve_boundary(self.fetcher._day_timestamps(d)[0])
+                      for d in self.day_starts(dates)}
+        return self.day_ranges(dates, boundaries)
+
+    def report(self):
+        """Print how boundaries were resolved"""
+        print(f"✓ Day boundaries: {self.api_lookups:,} API lookups, "
+              f"{self.local_lookups:,} resolved from cached blocks")
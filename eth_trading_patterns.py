@@ -6,26 +6,79 @@ Author:Yuyan Kuang
 Date: January 2026
 """
 
-import requests
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
 from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
 import time
 import os
+import argparse
 
-# Set up plotting style
-sns.set_style("whitegrid")
-plt.rcParams['figure.figsize'] = (12, 6)
+from async_fetcher import AsyncEtherscanFetcher
+from http_transport import HttpTransport, TransportError
+from block_cache import BlockCache
+from block_index import BlockIndex
+from block_record import DAY_METRIC_COLUMNS, BlockRecord, day_metrics
+from rpc_backend import JsonRpcBackend
+from exact_counter import ExactBlockCounter
+from day_boundaries import DayBoundaryResolver
+from adaptive_sampler import AdaptiveSampler
+from intraday import IntradayAggregator
+from journal import FetchJournal
+from key_pool import KeyPool
+from metrics import FetchMetrics
+from online_stats import WeekendEffectAccumulator, rolling_weekend_effect
+from render import FINAL_DPI, PREVIEW_DPI, render_figures
+
+
+def _plotting():
+    """
+    Import matplotlib and seaborn on first use and apply the plot style
+
+    Keeping them out of module import lets the fetcher and analyzer be used
+    as a library, or run headless, without loading the plotting stack.
+    """
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    sns.set_style("whitegrid")
+    plt.rcParams['figure.figsize'] = (12, 6)
+    return plt, sns
 
 
 class EtherscanDataFetcher:
     """Fetches data from Etherscan API"""
     
-    def __init__(self, api_key):
+    def __init__(self, api_key, rate_limiter=None, cache=None, backend=None,
+                 target_rel_error=0.05, max_samples_per_day=20, transport=None,
+                 chainid='1', base_url="https://api.etherscan.io/v2/api", metrics=None,
+                 key_pool=None, tz='UTC', full_transactions=False, block_metrics=False):
         self.api_key = api_key
-        self.base_url = "https://api.etherscan.io/v2/api"
-        self.chainid = '1'  # Ethereum mainnet
+        self.base_url = base_url
+        self.chainid = str(chainid)  # '1' is Ethereum mainnet
+        # Pooled keep-alive session with retry/backoff shared by every call
+        self.transport = transport or HttpTransport()
+        # Optional shared TokenBucket; when set it replaces the fixed sleeps
+        self.rate_limiter = rate_limiter
+        # Optional BlockCache consulted before any block request
+        self.cache = cache
+        # Optional block source (e.g. JsonRpcBackend); defaults to the Etherscan proxy
+        self.backend = backend
+        # Set to an ExactBlockCounter to count every block instead of sampling
+        self.exact_counter = None
+        # Adaptive sampling stops at this relative standard error or budget
+        self.target_rel_error = target_rel_error
+        self.max_samples_per_day = max_samples_per_day
+        # Optional FetchMetrics; shared with the transport so HTTP attempts are recorded too
+        self.metrics = metrics
+        if metrics is not None:
+            self.transport.metrics = metrics
+        # Optional KeyPool; when set each call picks its own key and per-key rate limit
+        self.key_pool = key_pool
+        # Calendar days are cut at midnight in this IANA timezone, never the host's local time
+        self.tz = ZoneInfo(tz)
+        # Request full transaction objects so senders, recipients and value can be extracted
+        self.full_transactions = full_transactions
+        # Add per-day gas/fee/blob/address columns from the cached block metrics
+        self.block_metrics = block_metrics
     
     def get_daily_transaction_count(self, date):
         """
@@ -38,8 +91,7 @@ class EtherscanDataFetcher:
         dict: Contains date and transaction count
         """
         # Convert date to unix timestamp (start and end of day)
-        start_timestamp = int(date.replace(hour=0, minute=0, second=0).timestamp())
-        end_timestamp = int(date.replace(hour=23, minute=59, second=59).timestamp())
+        start_timestamp, end_timestamp = self._day_timestamps(date)
         
         # Etherscan API parameters
         params = {
@@ -61,23 +113,61 @@ class EtherscanDataFetcher:
             end_block = self._get_block_by_timestamp(end_timestamp, 'before')
             
             if start_block and end_block:
-                # For simplicity, we'll estimate transaction count
-                # In a real analysis, you'd sum up all transactions in blocks
-                tx_count = self._estimate_tx_count(start_block, end_block)
+                # Count every block in exact mode, otherwise estimate from a sample
+                if self.exact_counter is not None:
+                    tx_count = self.exact_counter.count_range(start_block, end_block)
+                    tx_count_se = 0.0
+                else:
+                    tx_count, tx_count_se = self._estimate_tx_count(start_block, end_block)
                 
-                return {
-                    'date': date.strftime('%Y-%m-%d'),
-                    'tx_count': tx_count,
-                    'start_block': start_block,
-                    'end_block': end_block
-                }
+                return self._day_record(date, tx_count, start_block, end_block, tx_count_se)
             
         except Exception as e:
             print(f"Error fetching data for {date.strftime('%Y-%m-%d')}: {str(e)}")
             return None
     
+    def _day_timestamps(self, date):
+        """Unix timestamps for the first and last second of a calendar day in self.tz"""
+        # From midnight to the next midnight, so DST days are 23 or 25 hours long
+        next_day = date + timedelta(days=1)
+        start_timestamp = int(datetime(date.year, date.month, date.day, tzinfo=self.tz).timestamp())
+        end_timestamp = int(datetime(next_day.year, next_day.month, next_day.day, tzinfo=self.tz).timestamp()) - 1
+        return start_timestamp, end_timestamp
+    
+    def _day_record(self, date, tx_count, start_block, end_block, tx_count_se=0.0):
+        """Build the output row for one day (tx_count_se is 0 for exact counts)"""
+        record = {
+            'date': date.strftime('%Y-%m-%d'),
+            'tx_count': tx_count,
+            'tx_count_se': round(tx_count_se, 1),
+            'start_block': start_block,
+            'end_block': end_block
+        }
+        if self.block_metrics and self.cache is not None:
+            # The fetched blocks already carry these metrics, so this costs no API calls
+            aggregates = self.cache.range_metrics(self.chainid, start_block, end_block)
+            record.update(day_metrics(aggregates, end_block - start_block + 1))
+            if not aggregates['blocks'] or (self.full_transactions and aggregates['unique_senders'] is None):
+                print(f"Warning: {record['date']} has no cached metrics for the requested columns "
+                      f"(blocks cached by an earlier run were not refetched)")
+        return record
+    
+    def _request(self, params):
+        """Send one GET request to the Etherscan API and return the decoded JSON"""
+        if self.key_pool is not None:
+            return self.key_pool.get_json(self.transport, self.base_url, params)
+        return self.transport.get_json(self.base_url, params, rate_limiter=self.rate_limiter)
+    
     def _get_block_by_timestamp(self, timestamp, closest='before'):
         """Get block number closest to a timestamp"""
+        if self.cache is not None:
+            cached = self.cache.get_block_by_timestamp(self.chainid, timestamp, closest)
+            if self.metrics is not None:
+                self.metrics.record_cache('getblocknobytime', int(cached is not None),
+                                          int(cached is None))
+            if cached is not None:
+                return cached
+        
         params = {
             'chainid': self.chainid,
             'module': 'block',
@@ -87,96 +177,196 @@ class EtherscanDataFetcher:
             'apikey': self.api_key
         }
         
-        response = requests.get(self.base_url, params=params)
-        data = response.json()
+        data = self._request(params)
         
         if data['status'] == '1':
-            return int(data['result'])
+            block_num = int(data['result'])
+            if self.cache is not None:
+                self.cache.put_block_by_timestamp(self.chainid, timestamp, closest, block_num)
+            return block_num
         return None
     
     def _estimate_tx_count(self, start_block, end_block):
         """
         Estimate transaction count between two blocks
-        This is a simplified version - samples a few blocks and estimates
-        """
-        # Sample 5 blocks evenly distributed
-        sample_blocks = []
-        step = max(1, (end_block - start_block) // 5)
-        
-        for i in range(5):
-            block_num = start_block + (i * step)
-            if block_num <= end_block:
-                sample_blocks.append(block_num)
-        
-        total_tx = 0
-        valid_samples = 0
         
-        for block_num in sample_blocks:
-            tx_count = self._get_block_tx_count(block_num)
-            if tx_count is not None:
-                total_tx += tx_count
-                valid_samples += 1
-            time.sleep(0.2)  # Rate limiting
+        Samples blocks adaptively across the day (see AdaptiveSampler) until the
+        target relative error or the per-day request budget is reached.
         
-        if valid_samples > 0:
-            avg_tx_per_block = total_tx / valid_samples
-            total_blocks = end_block - start_block + 1
-            return int(avg_tx_per_block * total_blocks)
-        
-        return 0
+        Returns:
+        tuple: (estimated transaction count, standard error of the estimate)
+        """
+        sampler = self._new_sampler(start_block, end_block)
+        
+        batch = sampler.next_batch()
+        while batch:
+            counts = self.get_block_tx_counts(batch)
+            for block_num in batch:
+                sampler.add(block_num, counts.get(block_num))
+            if self.rate_limiter is None and self.key_pool is None and self.backend is None:
+                time.sleep(0.2 * len(batch))  # Rate limiting
+            batch = sampler.next_batch()
+        
+        return sampler.estimate()
+    
+    def _new_sampler(self, start_block, end_block):
+        """Adaptive sampler for one day's block range using this fetcher's settings"""
+        return AdaptiveSampler(start_block, end_block,
+                               max_requests=self.max_samples_per_day,
+                               target_rel_error=self.target_rel_error)
     
     def _get_block_tx_count(self, block_num):
         """Get transaction count for a specific block"""
+        return self.get_block_tx_counts([block_num]).get(block_num)
+    
+    def get_block_tx_counts(self, block_nums):
+        """
+        Get transaction counts for many blocks
+        
+        Cached blocks are answered locally; the rest are fetched through the
+        configured backend (e.g. batched JSON-RPC) or the Etherscan proxy.
+        
+        Returns:
+        dict: Block number -> transaction count (None if the block could not be fetched)
+        """
+        block_nums = list(block_nums)
+        counts = {}
+        if self.cache is not None:
+            # Blocks cached before the requested metrics were collected count as misses
+            counts = self.cache.get_tx_counts(self.chainid, block_nums, self.required_columns())
+        missing = [block_num for block_num in block_nums if block_num not in counts]
+        if self.cache is not None and self.metrics is not None:
+            self.metrics.record_cache('eth_getBlockByNumber', len(counts), len(missing))
+        
+        if missing:
+            records = []
+            for block_num, block in self._fetch_blocks(missing).items():
+                counts[block_num] = None
+                if block:
+                    # Keep every metric in the payload, not just the transaction count
+                    record = BlockRecord.from_block(block_num, block, self.full_transactions)
+                    counts[block_num] = record.tx_count
+                    records.append(record)
+            if self.cache is not None:
+                self.cache.put_records(self.chainid, records)
+        
+        return counts
+    
+    def required_columns(self):
+        """Metric columns a cached block needs for this run's --block-metrics / --full-transactions"""
+        required = []
+        if self.block_metrics:
+            required.append('gas_used')
+        if self.full_transactions:
+            required.append('unique_senders')
+        return tuple(required)
+    
+    def _fetch_blocks(self, block_nums):
+        """Fetch raw block objects from the backend, or one by one via the Etherscan proxy"""
+        if self.backend is not None:
+            return self.backend.get_blocks(block_nums)
+        return {block_num: self._get_block(block_num) for block_num in block_nums}
+    
+    def _get_block(self, block_num):
+        """Fetch a block object through the Etherscan proxy module"""
         params = {
             'chainid': self.chainid,
             'module': 'proxy',
             'action': 'eth_getBlockByNumber',
             'tag': hex(block_num),
-            'boolean': 'false',
+            'boolean': 'true' if self.full_transactions else 'false',
             'apikey': self.api_key
         }
         
         try:
-            response = requests.get(self.base_url, params=params)
-            data = response.json()
-            
-            if 'result' in data and data['result']:
-                transactions = data['result'].get('transactions', [])
-                return len(transactions)
-        except:
-            pass
+            data = self._request(params)
+        except TransportError as e:
+            print(f"Error fetching block {block_num}: {str(e)}")
+            return None
         
+        result = data.get('result')
+        if isinstance(result, dict):
+            return result
+        if result:
+            # Proxy errors come back as a message string instead of a block
+            print(f"Error fetching block {block_num}: {result}")
         return None
 
 
 class TradingPatternAnalyzer:
     """Analyzes trading patterns from transaction data"""
     
-    def __init__(self, data):
+    def __init__(self, data, resolution='daily', tz='UTC'):
+        """
+        Parameters:
+        data (list or DataFrame): Daily rows with 'date', or hourly rows with
+                                  'hour' in local wall time (see BlockIndex.hourly_frame)
+        resolution (str): 'daily' or 'hourly'
+        tz (str): Timezone the days / hours were cut in (shown in the reports)
+        """
+        if resolution not in ('daily', 'hourly'):
+            raise ValueError(f"Unknown resolution: {resolution}")
+        self.resolution = resolution
+        self.tz = tz
         self.df = pd.DataFrame(data)
         if not self.df.empty:
-            self.df['date'] = pd.to_datetime(self.df['date'])
+            if resolution == 'hourly':
+                self.df['hour'] = pd.to_datetime(self.df['hour'])
+                self.df['date'] = self.df['hour'].dt.normalize()
+                self.df['hour_of_day'] = self.df['hour'].dt.hour
+            else:
+                self.df['date'] = pd.to_datetime(self.df['date'])
             self.df['day_of_week'] = self.df['date'].dt.dayofweek
             self.df['day_name'] = self.df['date'].dt.day_name()
             self.df['is_weekend'] = self.df['day_of_week'].isin([5, 6])
             self.df['month'] = self.df['date'].dt.month
     
+    @classmethod
+    def from_block_index(cls, index, resolution='daily', tz='UTC'):
+        """
+        Analyzer over days or hours re-bucketed from a BlockIndex
+
+        Parameters:
+        index (BlockIndex): Per-block index built from the block cache
+        resolution (str): 'daily' or 'hourly'
+        tz (str): Timezone whose calendar days / clock hours define the buckets
+        """
+        if resolution == 'hourly':
+            return cls(index.hourly_frame(tz), resolution='hourly', tz=tz)
+        return cls(index.daily_frame(tz), resolution='daily', tz=tz)
+    
+    def weekend_summary(self):
+        """Weekday and weekend averages without printing anything"""
+        acc = WeekendEffectAccumulator.from_frame(self.df)
+        weekend_avg = acc.weekend.mean
+        weekday_avg = acc.weekday.mean
+        return {
+            'days': self.df['date'].nunique(),
+            'weekday_avg': weekday_avg,
+            'weekend_avg': weekend_avg,
+            'pct_change': (weekend_avg / weekday_avg - 1) * 100,
+        }
+    
     def analyze_weekend_effect(self):
         """Analyze differences between weekend and weekday trading"""
         if self.df.empty:
             print("No data to analyze")
             return
         
-        weekend_avg = self.df[self.df['is_weekend']]['tx_count'].mean()
-        weekday_avg = self.df[~self.df['is_weekend']]['tx_count'].mean()
+        summary = self.weekend_summary()
+        weekend_avg = summary['weekend_avg']
+        weekday_avg = summary['weekday_avg']
         
         print("\n" + "="*50)
+        per = ' per hour' if self.resolution == 'hourly' else ''
         print("WEEKEND vs WEEKDAY ANALYSIS")
         print("="*50)
-        print(f"Average weekday transactions: {weekday_avg:,.0f}")
-        print(f"Average weekend transactions: {weekend_avg:,.0f}")
-        print(f"Difference: {weekend_avg - weekday_avg:,.0f} ({((weekend_avg/weekday_avg - 1) * 100):.2f}%)")
+        print(f"Average weekday transactions{per}: {weekday_avg:,.0f}")
+        print(f"Average weekend transactions{per}: {weekend_avg:,.0f}")
+        print(f"Difference: {weekend_avg - weekday_avg:,.0f} ({summary['pct_change']:.2f}%)")
         print("="*50 + "\n")
+        
+        return summary
     
     def analyze_day_of_week_effect(self):
         """Analyze patterns by day of week"""
@@ -194,62 +384,407 @@ class TradingPatternAnalyzer:
         
         return day_stats
     
-    def plot_weekend_comparison(self):
-        """Create visualization comparing weekend vs weekday"""
-        fig, axes = plt.subplots(1, 2, figsize=(14, 6))
+    def analyze_block_metrics(self):
+        """
+        Weekend effect on every per-block metric column in the data (see --block-metrics)
         
-        # Box plot
-        self.df['Period'] = self.df['is_weekend'].map({True: 'Weekend', False: 'Weekday'})
-        sns.boxplot(data=self.df, x='Period', y='tx_count', ax=axes[0])
-        axes[0].set_title('Transaction Count: Weekday vs Weekend', fontsize=14, fontweight='bold')
-        axes[0].set_ylabel('Transaction Count')
-        axes[0].set_xlabel('')
+        Returns:
+        DataFrame: metric, days, weekday/weekend means, % change, Cohen's d, t-test
+        """
+        rows = []
+        for column in DAY_METRIC_COLUMNS:
+            if column not in self.df:
+                continue
+            values = self.df.dropna(subset=[column])
+            acc = WeekendEffectAccumulator.from_frame(values, column)
+            if acc.weekday.count < 2 or acc.weekend.count < 2:
+                continue
+            t_stat, p_value = acc.t_test()
+            rows.append({
+                'metric': column,
+                'days': len(values),
+                'weekday_avg': acc.weekday.mean,
+                'weekend_avg': acc.weekend.mean,
+                'pct_change': (acc.weekend.mean / acc.weekday.mean - 1) * 100 if acc.weekday.mean else float('nan'),
+                'cohens_d': acc.cohens_d(),
+                't_stat': t_stat,
+                'p_value': p_value,
+            })
+        results = pd.DataFrame(rows)
         
-        # Bar plot by day
-        day_order = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-        day_avg = self.df.groupby('day_name')['tx_count'].mean().reindex(day_order)
+        print("\n" + "="*50)
+        print("WEEKEND EFFECT BY BLOCK METRIC")
+        print("="*50)
+        if results.empty:
+            print("No block metrics in the data (fetch with --block-metrics)")
+        else:
+            print(results.to_string(index=False, float_format=lambda x: f"{x:,.4g}"))
+        print("="*50 + "\n")
         
-        colors = ['#1f77b4']*5 + ['#ff7f0e']*2  # Blue for weekdays, orange for weekend
-        day_avg.plot(kind='bar', ax=axes[1], color=colors)
-        axes[1].set_title('Average Transaction Count by Day of Week', fontsize=14, fontweight='bold')
-        axes[1].set_ylabel('Average Transaction Count')
-        axes[1].set_xlabel('Day of Week')
-        axes[1].tick_params(axis='x', rotation=45)
+        return results
+    
+    def analyze_hour_of_day_effect(self):
+        """Average hourly transactions by hour of day, weekdays vs weekends (hourly data only)"""
+        if self.resolution != 'hourly':
+            raise ValueError("Hour-of-day analysis needs hourly data")
+        
+        hour_stats = self.df.pivot_table(index='hour_of_day', columns='is_weekend',
+                                         values='tx_count', aggfunc='mean')
+        hour_stats = hour_stats.rename(columns={False: 'weekday', True: 'weekend'})
+        hour_stats.columns.name = None
+        if {'weekday', 'weekend'} <= set(hour_stats.columns):
+            hour_stats['pct_change'] = (hour_stats['weekend'] / hour_stats['weekday'] - 1) * 100
+        
+        print("\n" + "="*50)
+        print(f"HOUR OF DAY ANALYSIS ({self.tz})")
+        print("="*50)
+        print(hour_stats.round(1).to_string())
+        print("="*50 + "\n")
+        
+        return hour_stats
+    
+    def analyze_rolling_effect(self, window=90):
+        """Weekend effect over a trailing window of `window` days, for every day"""
+        rolling = rolling_weekend_effect(self.df, window=window)
+        valid = rolling.dropna(subset=['cohens_d'])
+        
+        print("\n" + "="*50)
+        print(f"ROLLING WEEKEND EFFECT ({window}-day window)")
+        print("="*50)
+        if valid.empty:
+            print(f"Not enough data for a {window}-day window")
+        else:
+            print(f"Windows: {len(valid)}")
+            print(f"Weekday - weekend gap: {valid['difference'].min():,.0f} to "
+                  f"{valid['difference'].max():,.0f} (median {valid['difference'].median():,.0f})")
+            print(f"Cohen's d: {valid['cohens_d'].min():.2f} to {valid['cohens_d'].max():.2f}")
+            print(f"Windows with |t| > 1.96: {(valid['t_stat'].abs() > 1.96).mean() * 100:.1f}%")
+        print("="*50 + "\n")
         
-        plt.tight_layout()
-        plt.savefig('outputs/weekend_effect_analysis.png', dpi=300, bbox_inches='tight')
+        return rolling
+    
+    def figures(self, rolling_window=90):
+        """
+        Figures for the render pipeline
+
+        Returns:
+        list: (draw function, input data, output path) tuples for render.render_figures
+        """
+        figures = [
+            (draw_weekend_comparison, self.df[['is_weekend', 'day_name', 'tx_count']],
+             'outputs/weekend_effect_analysis.png'),
+            (draw_time_series, self.df[['date', 'tx_count', 'is_weekend']],
+             'outputs/transaction_timeseries.png'),
+        ]
+        if rolling_window and self.df['date'].nunique() >= rolling_window:
+            figures.append((draw_rolling_effect, rolling_weekend_effect(self.df, window=rolling_window),
+                            'outputs/rolling_weekend_effect.png'))
+        return figures
+    
+    def plot_weekend_comparison(self, dpi=FINAL_DPI):
+        """Create visualization comparing weekend vs weekday"""
+        draw_weekend_comparison(self.df, 'outputs/weekend_effect_analysis.png', dpi)
         print("✓ Saved visualization: outputs/weekend_effect_analysis.png")
-        plt.close()
     
-    def plot_time_series(self):
+    def plot_time_series(self, dpi=FINAL_DPI):
         """Plot transaction counts over time"""
-        plt.figure(figsize=(14, 6))
-        
-        # Plot all data
-        plt.plot(self.df['date'], self.df['tx_count'], alpha=0.5, linewidth=1, label='Daily transactions')
-        
-        # Add 7-day moving average
-        self.df['ma_7'] = self.df['tx_count'].rolling(window=7, center=True).mean()
-        plt.plot(self.df['date'], self.df['ma_7'], linewidth=2, color='red', label='7-day moving average')
-        
-        # Highlight weekends
-        weekend_data = self.df[self.df['is_weekend']]
-        plt.scatter(weekend_data['date'], weekend_data['tx_count'], color='orange', 
-                   alpha=0.6, s=30, label='Weekend', zorder=5)
-        
-        plt.title('Ethereum Transaction Count Over Time (2025)', fontsize=14, fontweight='bold')
-        plt.xlabel('Date')
-        plt.ylabel('Transaction Count')
-        plt.legend()
-        plt.grid(True, alpha=0.3)
-        plt.tight_layout()
-        plt.savefig('outputs/transaction_timeseries.png', dpi=300, bbox_inches='tight')
+        draw_time_series(self.df, 'outputs/transaction_timeseries.png', dpi)
         print("✓ Saved visualization: outputs/transaction_timeseries.png")
-        plt.close()
 
 
-def main():
+def draw_weekend_comparison(df, path, dpi=FINAL_DPI):
+    """Box plot of weekday vs weekend and average by day of week"""
+    plt, sns = _plotting()
+    fig, axes = plt.subplots(1, 2, figsize=(14, 6))
+    
+    # Box plot
+    df = df.assign(Period=df['is_weekend'].map({True: 'Weekend', False: 'Weekday'}))
+    sns.boxplot(data=df, x='Period', y='tx_count', ax=axes[0])
+    axes[0].set_title('Transaction Count: Weekday vs Weekend', fontsize=14, fontweight='bold')
+    axes[0].set_ylabel('Transaction Count')
+    axes[0].set_xlabel('')
+    
+    # Bar plot by day
+    day_order = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+    day_avg = df.groupby('day_name')['tx_count'].mean().reindex(day_order)
+    
+    colors = ['#1f77b4']*5 + ['#ff7f0e']*2  # Blue for weekdays, orange for weekend
+    day_avg.plot(kind='bar', ax=axes[1], color=colors)
+    axes[1].set_title('Average Transaction Count by Day of Week', fontsize=14, fontweight='bold')
+    axes[1].set_ylabel('Average Transaction Count')
+    axes[1].set_xlabel('Day of Week')
+    axes[1].tick_params(axis='x', rotation=45)
+    
+    plt.tight_layout()
+    plt.savefig(path, dpi=dpi, bbox_inches='tight')
+    plt.close()
+
+
+def draw_time_series(df, path, dpi=FINAL_DPI):
+    """Daily transaction counts with a 7-day moving average and weekends highlighted"""
+    plt, _ = _plotting()
+    plt.figure(figsize=(14, 6))
+    
+    # Plot all data
+    plt.plot(df['date'], df['tx_count'], alpha=0.5, linewidth=1, label='Daily transactions')
+    
+    # Add 7-day moving average
+    ma_7 = df['tx_count'].rolling(window=7, center=True).mean()
+    plt.plot(df['date'], ma_7, linewidth=2, color='red', label='7-day moving average')
+    
+    # Highlight weekends
+    weekend_data = df[df['is_weekend']]
+    plt.scatter(weekend_data['date'], weekend_data['tx_count'], color='orange', 
+               alpha=0.6, s=30, label='Weekend', zorder=5)
+    
+    plt.title('Ethereum Transaction Count Over Time (2025)', fontsize=14, fontweight='bold')
+    plt.xlabel('Date')
+    plt.ylabel('Transaction Count')
+    plt.legend()
+    plt.grid(True, alpha=0.3)
+    plt.tight_layout()
+    plt.savefig(path, dpi=dpi, bbox_inches='tight')
+    plt.close()
+
+
+def draw_rolling_effect(rolling, path, dpi=FINAL_DPI):
+    """Rolling weekday - weekend gap and Cohen's d (output of rolling_weekend_effect)"""
+    plt, _ = _plotting()
+    fig, axes = plt.subplots(2, 1, figsize=(14, 8), sharex=True)
+    
+    axes[0].plot(rolling['date'], rolling['difference'], color='#1f77b4', linewidth=2)
+    axes[0].axhline(0, color='black', linewidth=1)
+    axes[0].set_title('Weekday - Weekend Gap (rolling window)', fontsize=14, fontweight='bold')
+    axes[0].set_ylabel('Transactions per Day')
+    axes[0].grid(True, alpha=0.3)
+    
+    axes[1].plot(rolling['date'], rolling['cohens_d'], color='#ff7f0e', linewidth=2)
+    for level in (0.2, 0.5, 0.8):
+        axes[1].axhline(level, color='gray', linestyle='--', linewidth=1)
+    axes[1].set_title("Rolling Cohen's d", fontsize=14, fontweight='bold')
+    axes[1].set_ylabel("Cohen's d")
+    axes[1].set_xlabel('Window End Date')
+    axes[1].grid(True, alpha=0.3)
+    
+    plt.tight_layout()
+    plt.savefig(path, dpi=dpi, bbox_inches='tight')
+    plt.close()
+
+
+def load_dataset(path):
+    """Load an existing daily dataset, or None if there is none yet"""
+    if not os.path.exists(path):
+        return None
+    df = pd.read_csv(path)
+    # Older files store dates as e.g. 1/1/2025; normalize everything to ISO
+    df['date'] = pd.to_datetime(df['date'], format='mixed').dt.strftime('%Y-%m-%d')
+    return df
+
+
+def find_missing_dates(df, start_date, end_date):
+    """
+    Dates in the range that are absent from the dataset or marked incomplete
+    
+    A row is incomplete when its transaction count is missing or zero (every
+    sample failed) or its block range is unknown.
+    """
+    wanted = DayBoundaryResolver.date_range(start_date, end_date)
+    if df is None or df.empty:
+        return wanted
+    
+    complete = df['tx_count'].notna() & (df['tx_count'] > 0)
+    complete &= df['start_block'].notna() & df['end_block'].notna()
+    have = set(df.loc[complete, 'date'])
+    return [d for d in wanted if d.strftime('%Y-%m-%d') not in have]
+
+
+def save_dataset(df, path):
+    """Write the dataset atomically so a crash never leaves a half-written file"""
+    tmp_path = path + '.tmp'
+    df.to_csv(tmp_path, index=False)
+    os.replace(tmp_path, path)
+
+
+def merge_dataset(existing, new_rows):
+    """Replace or add the fetched days in an existing dataset, sorted by date"""
+    new_df = pd.DataFrame(new_rows)
+    if new_df.empty:
+        return existing if existing is not None else new_df
+    if existing is None or existing.empty:
+        return new_df.sort_values('date').reset_index(drop=True)
+    merged = pd.concat([existing[~existing['date'].isin(new_df['date'])], new_df],
+                       ignore_index=True)
+    return merged.sort_values('date').reset_index(drop=True)
+
+
+def compare_timezones(index, timezones, start_date=None, end_date=None):
+    """
+    Weekend effect with calendar days cut in each timezone, from cached blocks only
+    
+    Parameters:
+    index (BlockIndex): Per-block index of an exact crawl
+    timezones (list): IANA timezone names, e.g. ['UTC', 'America/New_York']
+    start_date, end_date (datetime): Optional range of local days to compare
+    
+    Returns:
+    DataFrame: One row per timezone with days, averages, % change, Cohen's d and t-test
+    """
+    rows = []
+    for tz in timezones:
+        daily = index.daily_frame(tz)
+        if start_date is not None:
+            daily = daily[daily['date'] >= start_date.strftime('%Y-%m-%d')]
+        if end_date is not None:
+            daily = daily[daily['date'] <= end_date.strftime('%Y-%m-%d')]
+        acc = WeekendEffectAccumulator.from_frame(TradingPatternAnalyzer(daily).df)
+        if acc.weekday.count < 2 or acc.weekend.count < 2:
+            print(f"  {tz}: not enough complete days in the cached blocks")
+            continue
+        t_stat, p_value = acc.t_test()
+        rows.append({
+            'timezone': tz,
+            'days': len(daily),
+            'weekday_avg': acc.weekday.mean,
+            'weekend_avg': acc.weekend.mean,
+            'pct_change': (acc.weekend.mean / acc.weekday.mean - 1) * 100,
+            'cohens_d': acc.cohens_d(),
+            't_stat': t_stat,
+            'p_value': p_value,
+        })
+    return pd.DataFrame(rows)
+
+
+def fetch_transaction_data(fetcher, dates, requests_per_second=5, max_concurrency=8, progress=True,
+                           journal=None):
+    """
+    Fetch daily records for many dates concurrently under one rate limit
+    
+    Parameters:
+    fetcher (EtherscanDataFetcher): Configured fetcher
+    dates (list): Dates to fetch
+    requests_per_second (float): Shared request budget
+    max_concurrency (int): Requests in flight at once
+    progress (bool): Print progress and the boundary/cache reports
+    journal (FetchJournal): Optional write-ahead journal each finished day is appended to
+    
+    Returns:
+    list: Day records (days that failed are left out)
+    """
+    engine = AsyncEtherscanFetcher(fetcher, requests_per_second=requests_per_second,
+                                   max_concurrency=max_concurrency, journal=journal)
+    new_data = engine.run_dates(dates, progress=progress) if dates else []
+    
+    if progress:
+        print("\n✓ Data fetch complete!                              \n")
+        engine.resolver.report()
+        if fetcher.cache is not None:
+            fetcher.cache.report()
+            print()
+        if fetcher.key_pool is not None:
+            fetcher.key_pool.report()
+            print()
+    return new_data
+
+
+def parse_args(argv=None):
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description="Ethereum weekend/weekday activity analysis")
+    parser.add_argument('--start', type=lambda d: datetime.strptime(d, '%Y-%m-%d'),
+                        default=datetime(2025, 1, 1), help="First day to fetch (YYYY-MM-DD)")
+    parser.add_argument('--end', type=lambda d: datetime.strptime(d, '%Y-%m-%d'),
+                        default=datetime(2025, 12, 31), help="Last day to fetch (YYYY-MM-DD)")
+    parser.add_argument('--output', default='outputs/eth_transaction_data_2025.csv',
+                        help="Daily dataset CSV to write")
+    parser.add_argument('--incremental', action='store_true',
+                        help="Only fetch days missing from (or incomplete in) the existing dataset")
+    parser.add_argument('--rps', type=float, default=5,
+                        help="Maximum Etherscan requests per second per API key (free tier: 5)")
+    parser.add_argument('--concurrency', type=int, default=8,
+                        help="Maximum number of requests in flight at once (per API key)")
+    parser.add_argument('--api-keys',
+                        help="Comma-separated Etherscan API keys to shard calls across "
+                             "(default: env ETHERSCAN_API_KEYS, else ETHERSCAN_API_KEY)")
+    parser.add_argument('--key-daily-quota', type=int,
+                        help="Calls per key per UTC day before the key is rested (e.g. 100000)")
+    parser.add_argument('--cache', default='outputs/block_cache.sqlite',
+                        help="SQLite file for cached block lookups and transaction counts")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="Fetch everything from the API without using the block cache")
+    parser.add_argument('--base-url',
+                        default=os.getenv('ETHERSCAN_BASE_URL', "https://api.etherscan.io/v2/api"),
+                        help="Etherscan v2 endpoint (env ETHERSCAN_BASE_URL), e.g. a local chain_simulator.py")
+    parser.add_argument('--rpc-url',
+                        help="Fetch blocks from this JSON-RPC node instead of the Etherscan proxy")
+    parser.add_argument('--rpc-batch-size', type=int, default=100,
+                        help="eth_getBlockByNumber calls per JSON-RPC batch")
+    parser.add_argument('--rpc-in-flight', type=int, default=4,
+                        help="JSON-RPC batches pipelined at once")
+    parser.add_argument('--exact', action='store_true',
+                        help="Count every block in each day instead of sampling (best with --rpc-url)")
+    parser.add_argument('--checkpoint', default='outputs/exact_checkpoint.json',
+                        help="Progress file used to resume an interrupted exact crawl")
+    parser.add_argument('--exact-batch-size', type=int, default=500,
+                        help="Blocks fetched between checkpoints in exact mode")
+    parser.add_argument('--journal',
+                        help="Write-ahead journal of finished days and exact batches "
+                             "(default: <output>.journal)")
+    parser.add_argument('--no-journal', action='store_true',
+                        help="Do not journal progress; an interrupted run keeps only the checkpoint")
+    parser.add_argument('--target-error', type=float, default=0.05,
+                        help="Stop sampling a day once the relative standard error is below this")
+    parser.add_argument('--max-samples', type=int, default=20,
+                        help="Maximum block requests spent estimating one day")
+    parser.add_argument('--no-plots', action='store_true',
+                        help="Skip the visualizations (matplotlib is never imported)")
+    parser.add_argument('--rolling-window', type=int, default=90,
+                        help="Days per window for the rolling weekend-effect analysis (0 to skip)")
+    parser.add_argument('--preview', action='store_true',
+                        help=f"Render figures at {PREVIEW_DPI} dpi for quick iterations")
+    parser.add_argument('--render-workers', type=int,
+                        help="Processes used to render figures (default: one per figure)")
+    parser.add_argument('--metrics-out',
+                        help="Write per-action API metrics here (.prom for a Prometheus textfile, else JSON)")
+    parser.add_argument('--metrics-interval', type=float, default=0,
+                        help="Print a live metrics summary every N seconds while fetching")
+    parser.add_argument('--hourly', action='store_true',
+                        help="Also aggregate the counted blocks by hour and minute of week "
+                             "and run the hourly analysis (requires --exact)")
+    parser.add_argument('--hourly-output', default='outputs/eth_hourly_transaction_data.csv',
+                        help="Hourly dataset CSV written with --hourly")
+    parser.add_argument('--block-metrics', action='store_true',
+                        help="Add daily gas, base fee, blob gas (and, with --full-transactions, address "
+                             "and value) columns from the fetched blocks and test each for a weekend effect")
+    parser.add_argument('--full-transactions', action='store_true',
+                        help="Fetch full transaction objects (larger responses) for sender, recipient and value metrics")
+    parser.add_argument('--timezone', default='UTC',
+                        help="IANA timezone whose calendar days are fetched, e.g. America/New_York")
+    parser.add_argument('--compare-timezones',
+                        help="Comma-separated timezones to re-bucket the cached blocks into and compare "
+                             "(requires --exact; no extra API calls), e.g. UTC,America/New_York,Asia/Shanghai")
+    parser.add_argument('--parquet-dir',
+                        help="Also store the daily (and, with --exact, block-level) data as "
+                             "Parquet partitioned by chain and month under this directory")
+    args = parser.parse_args(argv)
+    if args.exact and args.no_cache:
+        parser.error("--exact streams blocks into the block cache and cannot be used with --no-cache")
+    if args.hourly and not args.exact:
+        parser.error("--hourly needs every block's timestamp, so it requires --exact")
+    if args.block_metrics and args.no_cache:
+        parser.error("--block-metrics aggregates the cached blocks and cannot be used with --no-cache")
+    if args.compare_timezones and not args.exact:
+        parser.error("--compare-timezones needs every block's timestamp, so it requires --exact")
+    for tz in [args.timezone] + (args.compare_timezones.split(',') if args.compare_timezones else []):
+        try:
+            ZoneInfo(tz.strip())
+        except (ValueError, KeyError):
+            parser.error(f"Unknown timezone: {tz}")
+    return args
+
+
+def main(argv=None):
     """Main execution function"""
+    args = parse_args(argv)
+    
     print("\n" + "="*50)
     print("ETHEREUM TRADING PATTERN ANALYSIS")
     print("="*50 + "\n")
@@ -257,8 +792,10 @@ def main():
     # Create outputs directory if it doesn't exist
     os.makedirs('outputs', exist_ok=True)
     
-    # Get API key from environment variable or user input
-    api_key = os.getenv('ETHERSCAN_API_KEY')
+    # Get API key(s) from the command line, environment variables or user input
+    api_keys = [key.strip() for key in (args.api_keys or os.getenv('ETHERSCAN_API_KEYS', '')).split(',')
+                if key.strip()]
+    api_key = api_keys[0] if api_keys else os.getenv('ETHERSCAN_API_KEY')
     
     if not api_key:
         print("Please enter your Etherscan API key:")
@@ -266,56 +803,178 @@ def main():
         api_key = input("API Key: ").strip()
     
     # Initialize fetcher
-    fetcher = EtherscanDataFetcher(api_key)
+    metrics = FetchMetrics() if args.metrics_out or args.metrics_interval else None
+    cache = None if args.no_cache else BlockCache(args.cache)
+    backend = None
+    if args.rpc_url:
+        backend = JsonRpcBackend(args.rpc_url, batch_size=args.rpc_batch_size,
+                                 max_in_flight=args.rpc_in_flight, metrics=metrics,
+                                 full_transactions=args.full_transactions)
+    key_pool = None
+    concurrency, rps = args.concurrency, args.rps
+    if len(api_keys) > 1 or args.key_daily_quota:
+        key_pool = KeyPool(api_keys or [api_key], requests_per_second=args.rps,
+                           daily_quota=args.key_daily_quota)
+        # Each key brings its own request budget
+        concurrency, rps = args.concurrency * len(key_pool), key_pool.requests_per_second
+        print(f"Sharding calls across {len(key_pool)} API keys ({rps:g} req/s combined)")
+    fetcher = EtherscanDataFetcher(api_key, cache=cache, backend=backend,
+                                   target_rel_error=args.target_error,
+                                   max_samples_per_day=args.max_samples,
+                                   transport=HttpTransport(pool_size=concurrency),
+                                   base_url=args.base_url, metrics=metrics, key_pool=key_pool,
+                                   tz=args.timezone, full_transactions=args.full_transactions,
+                                   block_metrics=args.block_metrics)
+    journal = None
+    if not args.no_journal:
+        journal = FetchJournal(args.journal or args.output + '.journal')
+    if args.exact:
+        fetcher.exact_counter = ExactBlockCounter(fetcher, checkpoint_path=args.checkpoint,
+                                                  batch_size=args.exact_batch_size,
+                                                  journal=journal)
+        complete, partial = fetcher.exact_counter.progress()
+        if complete or partial:
+            print(f"Resuming exact crawl: {complete} day(s) done, {partial} in progress")
     
     # Define date range
-    start_date = datetime(2025, 1, 1)
-    end_date = datetime(2025, 12, 31)
+    start_date = args.start
+    end_date = args.end
     
-    print(f"\nFetching data from {start_date.strftime('%Y-%m-%d')} to {end_date.strftime('%Y-%m-%d')}")
-    print("This may take a while due to API rate limits...\n")
-    
-    # Fetch data for each day
-    all_data = []
-    current_date = start_date
+    existing = None
+    if args.incremental:
+        # Only finished days can be fetched; today is still being produced
+        yesterday = datetime.combine(datetime.now(fetcher.tz).date(), datetime.min.time()) - timedelta(days=1)
+        end_date = min(end_date, yesterday)
+        existing = load_dataset(args.output)
+        dates = find_missing_dates(existing, start_date, end_date)
+        print(f"\nIncremental update: {len(dates)} missing or incomplete day(s) "
+              f"between {start_date.strftime('%Y-%m-%d')} and {end_date.strftime('%Y-%m-%d')}")
+    else:
+        dates = DayBoundaryResolver.date_range(start_date, end_date)
+        print(f"\nFetching data from {start_date.strftime('%Y-%m-%d')} to {end_date.strftime('%Y-%m-%d')} "
+              f"({args.timezone} days)")
+        print("This may take a while due to API rate limits...\n")
     
-    while current_date <= end_date:
-        print(f"Fetching data for {current_date.strftime('%Y-%m-%d')}...", end='\r')
-        
-        data = fetcher.get_daily_transaction_count(current_date)
-        if data:
-            all_data.append(data)
-        
-        current_date += timedelta(days=1)
-        time.sleep(0.25)  # Rate limiting: ~4 requests per second
+    # Days finished by an interrupted run are replayed from the journal, not refetched
+    recovered = {}
+    if journal is not None:
+        wanted = {d.strftime('%Y-%m-%d') for d in dates}
+        recovered = {date: row for date, row in journal.days(fetcher.chainid).items() if date in wanted}
+        if recovered:
+            dates = [d for d in dates if d.strftime('%Y-%m-%d') not in recovered]
+            print(f"✓ Recovered {len(recovered)} finished day(s) from {journal.path}, "
+                  f"{len(dates)} left to fetch\n")
     
-    print("\n✓ Data fetch complete!                              \n")
+    # Fetch all days concurrently under a shared requests-per-second budget
+    if args.metrics_interval:
+        metrics.start_live_summary(args.metrics_interval)
+    new_data = list(recovered.values()) + fetch_transaction_data(
+        fetcher, dates, requests_per_second=rps, max_concurrency=concurrency,
+        journal=journal)
+    if metrics is not None:
+        metrics.stop_live_summary()
+        print(f"✓ API calls: {metrics.summary()}")
+        if args.metrics_out:
+            metrics.write(args.metrics_out)
+            print(f"✓ Saved fetch metrics: {args.metrics_out}")
+        print()
     
-    # Save raw data
+    # Save raw data (merged into the existing dataset in incremental mode)
+    df = merge_dataset(existing, new_data)
+    all_data = df.to_dict('records')
     if all_data:
-        df = pd.DataFrame(all_data)
-        df.to_csv('outputs/eth_transaction_data_2025.csv', index=False)
-        print(f"✓ Saved raw data: outputs/eth_transaction_data_2025.csv ({len(all_data)} days)\n")
+        if new_data:
+            save_dataset(df, args.output)
+            print(f"✓ Saved raw data: {args.output} ({len(all_data)} days, {len(new_data)} fetched)\n")
+            if journal is not None:
+                # The days are in the dataset now; keep only exact-count checkpoints
+                journal.compact()
+        else:
+            print(f"✓ {args.output} is already up to date ({len(all_data)} days)\n")
+        
+        if args.parquet_dir:
+            import storage  # Parquet support needs pyarrow, so only load it when asked
+            storage.write_daily(df, chainid=fetcher.chainid,
+                                root=os.path.join(args.parquet_dir, 'daily'))
+            print(f"✓ Saved Parquet dataset: {os.path.join(args.parquet_dir, 'daily')}")
+            if args.exact:
+                blocks = storage.export_block_cache(
+                    cache, chainid=fetcher.chainid,
+                    start_block=int(df['start_block'].min()), end_block=int(df['end_block'].max()),
+                    root=os.path.join(args.parquet_dir, 'blocks'))
+                print(f"✓ Saved block-level Parquet dataset: {blocks:,} blocks")
+            print()
         
         # Analyze patterns
-        analyzer = TradingPatternAnalyzer(all_data)
+        analyzer = TradingPatternAnalyzer(all_data, tz=args.timezone)
         analyzer.analyze_weekend_effect()
         analyzer.analyze_day_of_week_effect()
+        if args.block_metrics:
+            analyzer.analyze_block_metrics()
+        if args.rolling_window:
+            analyzer.analyze_rolling_effect(window=args.rolling_window)
+        
+        if args.hourly:
+            # Every counted block is in the cache with its timestamp, so the
+            # hourly buckets come from there rather than a second crawl. Hours and
+            # the minute-of-week profile use the same --timezone as the daily data
+            index = BlockIndex.open(cache, fetcher.chainid)
+            hourly = index.hourly_frame(args.timezone)
+            first_day = pd.Timestamp(df['date'].min())
+            last_day = pd.Timestamp(df['date'].max()) + pd.Timedelta(days=1)
+            hourly = hourly[(hourly['hour'] >= first_day) & (hourly['hour'] < last_day)].reset_index(drop=True)
+            intraday = IntradayAggregator.from_block_cache(
+                cache, chainid=fetcher.chainid,
+                start_block=int(df['start_block'].min()), end_block=int(df['end_block'].max()),
+                tz=args.timezone)
+            save_dataset(hourly, args.hourly_output)
+            week_output = args.hourly_output.replace('.csv', '_minute_of_week.csv')
+            save_dataset(intraday.minute_of_week_frame(), week_output)
+            print(f"✓ Saved hourly data: {args.hourly_output} ({len(hourly)} {args.timezone} hours, "
+                  f"{int(hourly['blocks'].sum()):,} blocks)")
+            print(f"✓ Saved minute-of-week profile: {week_output}")
+            
+            hourly_analyzer = TradingPatternAnalyzer(hourly, resolution='hourly', tz=args.timezone)
+            hourly_analyzer.analyze_weekend_effect()
+            hourly_analyzer.analyze_hour_of_day_effect()
+        
+        if args.compare_timezones:
+            # Re-bucket the cached blocks into each timezone's days; no API calls
+            index = BlockIndex.open(cache, fetcher.chainid)
+            timezones = [tz.strip() for tz in args.compare_timezones.split(',') if tz.strip()]
+            comparison = compare_timezones(index, timezones, start_date, end_date)
+            print("\n" + "="*50)
+            print("WEEKEND EFFECT BY TIMEZONE")
+            print("="*50)
+            if not comparison.empty:
+                print(comparison.to_string(index=False, float_format=lambda x: f"{x:,.4g}"))
+                save_dataset(comparison, 'outputs/timezone_comparison.csv')
+                print("\n✓ Saved timezone comparison: outputs/timezone_comparison.csv")
+            print("="*50 + "\n")
         
         # Create visualizations
-        analyzer.plot_weekend_comparison()
-        analyzer.plot_time_series()
+        if not args.no_plots:
+            render_figures(analyzer.figures(rolling_window=args.rolling_window), dpi=PREVIEW_DPI if args.preview else FINAL_DPI,
+                           workers=args.render_workers)
         
         print("\n" + "="*50)
         print("ANALYSIS COMPLETE!")
         print("="*50)
         print("\nCheck the outputs folder for:")
         print("  • Raw data CSV")
-        print("  • Weekend effect visualization")
-        print("  • Time series plot")
+        if not args.no_plots:
+            print("  • Weekend effect visualization")
+            print("  • Time series plot")
+            if args.rolling_window:
+                print("  • Rolling weekend effect plot")
         print("\n")
     else:
         print("No data was fetched. Please check your API key and try again.")
+    
+    if journal is not None:
+        journal.close()
+    if cache is not None:
+        cache.close()
 
 
 if __name__ == "__main__":
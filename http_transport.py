@@ -0,0 +1,156 @@
+"""
+Shared HTTP Transport
+Pooled keep-alive sessions with timeouts and jittered exponential backoff for
+every Etherscan and JSON-RPC call
+
+Author: Yuyan Kuang
+Date: January 2026
+"""
+
+import random
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# HTTP status codes worth retrying: rate limited or a server-side failure
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class TransportError(Exception):
+    """Raised when a request still fails after all retries"""
+
+
+class RateLimitError(TransportError):
+    """Raised instead of retrying a rate-limited call when the caller asked to handle it"""
+
+
+def is_rate_limited(data):
+    """True for an Etherscan 'Max rate limit reached' style response body"""
+    if not isinstance(data, dict) or data.get('status') != '0':
+        return False
+    text = f"{data.get('message', '')} {data.get('result', '')}".lower()
+    return 'rate limit' in text
+
+
+class HttpTransport:
+    """
+    Keep-alive HTTP client with retry/backoff
+
+    One requests.Session (and its connection pool) is reused for all calls, so
+    TCP/TLS handshakes happen once per pooled connection instead of per
+    request. Connection errors, timeouts, HTTP 429/5xx, undecodable bodies and
+    Etherscan rate-limit messages are retried with jittered exponential
+    backoff; anything else is returned to the caller.
+    """
+
+    def __init__(self, timeout=15, max_retries=5, backoff_base=0.5, backoff_max=30, pool_size=16,
+                 metrics=None):
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        # Optional FetchMetrics recording every attempt
+        self.metrics = metrics
+
+    def _backoff(self, attempt, retry_after=None):
+        """Sleep before the next attempt: exponential with equal jitter, or Retry-After"""
+        if retry_after is not None:
+            delay = retry_after
+        else:
+            delay = min(self.backoff_max, self.backoff_base * 2 ** attempt)
+            delay = delay / 2 + random.uniform(0, delay / 2)
+        time.sleep(delay)
+
+    def request(self, method, url, rate_limiter=None, action=None, raise_on_rate_limit=False, **kwargs):
+        """
+        Send a request, retrying transient failures
+
+        Parameters:
+        method (str): 'GET' or 'POST'
+        url (str): Endpoint URL
+        rate_limiter (TokenBucket): Optional limiter charged once per attempt
+        action (str): Label for metrics, e.g. the Etherscan action
+        raise_on_rate_limit (bool): Raise RateLimitError on HTTP 429 or a rate-limit
+            body instead of backing off, e.g. so a KeyPool can switch keys
+
+        Returns:
+        tuple: (response, decoded JSON body)
+
+        Raises:
+        TransportError: If the request fails permanently or retries run out
+        """
+        kwargs.setdefault('timeout', self.timeout)
+        metrics = self.metrics
+        last_error = None
+        retry_after = None
+
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                self._backoff(attempt - 1, retry_after)
+            retry_after = None
+            if rate_limiter is not None:
+                rate_limiter.acquire()
+
+            started = time.perf_counter()
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                last_error = f"{type(e).__name__}: {e}"
+                if metrics is not None:
+                    metrics.record_retry(action, type(e).__name__.lower())
+                continue
+            latency = time.perf_counter() - started
+
+            if response.status_code in RETRY_STATUS_CODES:
+                last_error = f"HTTP {response.status_code}"
+                header = response.headers.get('Retry-After', '')
+                retry_after = min(float(header), self.backoff_max) if header.isdigit() else None
+                if metrics is not None:
+                    metrics.record_retry(action, f"http_{response.status_code}", latency)
+                if raise_on_rate_limit and response.status_code == 429:
+                    raise RateLimitError(last_error)
+                continue
+            if response.status_code >= 400:
+                if metrics is not None:
+                    metrics.record_error(action)
+                raise TransportError(f"HTTP {response.status_code} from {url}")
+
+            try:
+                data = response.json()
+            except ValueError:
+                last_error = "response was not valid JSON"
+                if metrics is not None:
+                    metrics.record_retry(action, 'invalid_json', latency)
+                continue
+
+            if is_rate_limited(data):
+                last_error = f"rate limited: {data.get('result')}"
+                if metrics is not None:
+                    metrics.record_retry(action, 'rate_limit', latency)
+                if raise_on_rate_limit:
+                    raise RateLimitError(str(data.get('result')))
+                continue
+
+            if metrics is not None:
+                metrics.record_call(action, latency, len(response.content))
+            return response, data
+
+        if metrics is not None:
+            metrics.record_error(action)
+        raise TransportError(f"Giving up after {self.max_retries + 1} attempts ({last_error})")
+
+    def get_json(self, url, params, rate_limiter=None, raise_on_rate_limit=False):
+        """GET with query parameters and return the decoded JSON body"""
+        return self.request('GET', url, rate_limiter=rate_limiter, action=params.get('action'),
+                            raise_on_rate_limit=raise_on_rate_limit, params=params)[1]
+
+    def post_json(self, url, payload, rate_limiter=None):
+        """POST a JSON payload and return the decoded JSON body"""
+        first = payload[0] if isinstance(payload, list) and payload else payload
+        action = first.get('method') if isinstance(first, dict) else None
+        return self.request('POST', url, rate_limiter=rate_limiter, action=action, json=payload)[1]
@@ -0,0 +1,113 @@
+"""
+Intraday Aggregation
+Streams per-block (timestamp, tx_count) records into minute-of-week buckets
+
+Author: Yuyan Kuang
+Date: January 2026
+"""
+
+import numpy as np
+import pandas as pd
+
+MINUTES_PER_WEEK = 7 * 24 * 60
+# 1970-01-01 was a Thursday; shift so that minute 0 of the week is Monday 00:00
+EPOCH_WEEK_OFFSET = 3 * 24 * 60
+
+
+class IntradayAggregator:
+    """
+    Incremental minute-of-week transaction totals
+
+    Blocks are folded into running sums as they arrive, so memory is fixed
+    (one slot per minute of the week) however many blocks are added.
+    Aggregators for disjoint block ranges can be merged. Minutes follow the
+    wall clock of `tz` (an IANA name), so Monday 00:00 there is minute 0.
+    Clock-hour totals come from BlockIndex.hourly_frame, which also skips
+    hours with uncached blocks.
+    """
+
+    def __init__(self, tz='UTC'):
+        self.tz = tz
+        self.week_tx = np.zeros(MINUTES_PER_WEEK, dtype=np.int64)
+        self.week_blocks = np.zeros(MINUTES_PER_WEEK, dtype=np.int64)
+        self.blocks = 0
+
+    def add(self, timestamp, tx_count):
+        """Add a single block"""
+        self.add_arrays(np.array([timestamp]), np.array([tx_count]))
+
+    def add_blocks(self, rows):
+        """
+        Add a chunk of blocks
+
+        Parameters:
+        rows (iterable): (block_number, tx_count, timestamp) tuples, as stored
+                         by BlockCache; rows missing either value are skipped
+        """
+        rows = [(tx, ts) for _, tx, ts in rows if tx is not None and ts is not None]
+        if rows:
+            tx_counts, timestamps = np.array(rows, dtype=np.int64).T
+            self.add_arrays(timestamps, tx_counts)
+
+    def add_arrays(self, timestamps, tx_counts):
+        """Add blocks given as parallel arrays of unix timestamps and tx counts"""
+        timestamps = np.asarray(timestamps, dtype=np.int64)
+        tx_counts = np.asarray(tx_counts, dtype=np.int64)
+
+
+        if self.tz == 'UTC':
+            local_minutes = timestamps // 60
+        else:
+            # Local wall-clock minutes since 1970-01-01 00:00, following DST changes
+            local = pd.to_datetime(timestamps, unit='s', utc=True).tz_convert(self.tz).tz_localize(None)
+            local_minutes = np.asarray((local - pd.Timestamp(0)) // pd.Timedelta(minutes=1), dtype=np.int64)
+        minutes = (local_minutes + EPOCH_WEEK_OFFSET) % MINUTES_PER_WEEK
+        self.week_tx += np.bincount(minutes, weights=tx_counts,
+                                    minlength=MINUTES_PER_WEEK).astype(np.int64)
+        self.week_blocks += np.bincount(minutes, minlength=MINUTES_PER_WEEK)
+        self.blocks += len(timestamps)
+
+    def merge(self, other):
+        """Fold another aggregator (covering different blocks, same tz) into this one"""
+        if other.tz != self.tz:
+            raise ValueError(f"Cannot merge a {other.tz} aggregator into a {self.tz} one")
+        self.week_tx += other.week_tx
+        self.week_blocks += other.week_blocks
+        self.blocks += other.blocks
+        return self
+
+    @classmethod
+    def from_block_cache(cls, cache, chainid='1', start_block=None, end_block=None,
+                         chunk_size=100_000, tz='UTC'):
+        """
+        Build an aggregator from blocks already stored in a BlockCache
+
+        Blocks are streamed in chunks, so an exact crawl can be re-bucketed
+        without a second crawl and without loading every block at once.
+        """
+        aggregator = cls(tz)
+        for chunk in cache.iter_blocks(chainid, start_block, end_block, chunk_size=chunk_size):
+            aggregator.add_blocks(chunk)
+        return aggregator
+
+    def minute_of_week_frame(self):
+        """
+        Totals for each minute of the week (Monday 00:00 in self.tz is minute 0)
+
+        Returns:
+        DataFrame: minute_of_week, day_name, hour, minute, tx_count, blocks, tx_per_block
+        """
+        minutes = np.arange(MINUTES_PER_WEEK)
+        day_names = np.array(['Monday', 'Tuesday', 'Wednesday', 'Thursday',
+                              'Friday', 'Saturday', 'Sunday'])
+        with np.errstate(invalid='ignore', divide='ignore'):
+            per_block = self.week_tx / self.week_blocks
+        return pd.DataFrame({
+            'minute_of_week': minutes,
+            'day_name': day_names[minutes // 1440],
+            'hour': (minutes % 1440) // 60,
+            'minute': minutes % 60,
+            'tx_count': self.week_tx,
+            'blocks': self.week_blocks,
+            'tx_per_block': per_block,
+        })
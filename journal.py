@@ -0,0 +1,114 @@
+"""
+Fetch Journal
+Append-only, fsync'd write-ahead log of finished days and exact-count batches, so an
+interrupted run loses no completed work
+
+Author: Yuyan Kuang
+Date: January 2026
+"""
+
+import json
+import os
+import threading
+
+
+def _json_default(value):
+    # NumPy scalars from the estimators
+    if hasattr(value, 'item'):
+        return value.item()
+    raise TypeError(f"Cannot journal {type(value).__name__}")
+
+
+class FetchJournal:
+    """
+    JSON-lines journal with one durable record per finished unit of work
+
+    Record types:
+      {"type": "day", "chainid": ..., "row": {date, tx_count, ...}}
+      {"type": "batch", "key": "chainid:start-end", "state": {next_block, tx_count, complete}}
+
+    Every append is flushed and fsync'd before returning. Replaying keeps the
+    last record per day or range, and a torn final line from a crash
+    mid-write is dropped when the journal is opened.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._repair()
+        self._file = open(path, 'a', encoding='utf-8')
+
+    def _repair(self):
+        """Cut off a partially written last line left by a crash"""
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'rb+') as f:
+            data = f.read()
+            if data and not data.endswith(b'\n'):
+                f.truncate(data.rfind(b'\n') + 1)
+
+    def append(self, record):
+        line = json.dumps(record, default=_json_default, separators=(',', ':')) + '\n'
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def append_day(self, chainid, row):
+        self.append({'type': 'day', 'chainid': str(chainid), 'row': row})
+
+    def append_batch(self, key, state):
+        self.append({'type': 'batch', 'key': key, 'state': state})
+
+    def records(self):
+        """Stream every intact record in write order"""
+        with self._lock:
+            self._file.flush()
+        with open(self.path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+
+    def days(self, chainid):
+        """Latest journaled row per date for a chain"""
+        days = {}
+        for record in self.records():
+            if record.get('type') == 'day' and record.get('chainid') == str(chainid):
+                days[record['row']['date']] = record['row']
+        return days
+
+    def batches(self):
+        """Latest exact-count checkpoint per range key"""
+        return {record['key']: record['state'] for record in self.records()
+                if record.get('type') == 'batch'}
+
+    def compact(self, drop_days=True):
+        """
+        Rewrite the journal with one record per range (and day, unless drop_days)
+
+        Called once the days are safely in the dataset; the latest exact-count
+        checkpoint of every range is kept so unfinished ranges still resume.
+        """
+        latest = {}
+        for record in self.records():
+            if record.get('type') == 'batch':
+                latest[('batch', record['key'])] = record
+            elif record.get('type') == 'day' and not drop_days:
+                latest[('day', record['chainid'], record['row']['date'])] = record
+
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for record in latest.values():
+                f.write(json.dumps(record, default=_json_default, separators=(',', ':')) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        with self._lock:
+            self._file.close()
+            os.replace(tmp_path, self.path)
+            self._file = open(self.path, 'a', encoding='utf-8')
+
+    def close(self):
+        with self._lock:
+            self._file.close()
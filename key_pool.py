@@ -0,0 +1,205 @@
+"""
+API Key Pool
+Shards Etherscan calls across several API keys, each with its own rate limit, daily
+quota and rate-limit health, always picking the least-loaded healthy key
+
+Author: Yuyan Kuang
+Date: January 2026
+"""
+
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+
+from http_transport import RateLimitError, TransportError
+from rate_limiter import TokenBucket
+
+
+class KeyPoolExhausted(TransportError):
+    """Raised when every key is out of daily quota or disabled"""
+
+
+class ApiKeyState:
+    """Rate limiter, usage and health of one API key"""
+
+    def __init__(self, key, requests_per_second, daily_quota=None):
+        self.key = key
+        # No bursts: a key's calls stay evenly spaced, so fixed one-second windows
+        # on the server side never see more than its rate
+        self.limiter = TokenBucket(requests_per_second, capacity=1)
+        self.daily_quota = daily_quota
+        self.used = 0
+        self.day = None
+        self.in_flight = 0
+        self.rate_limit_errors = deque()  # monotonic times of recent rate-limit hits
+        self.cooldown_until = 0.0
+        self.disabled = None  # reason, e.g. 'Invalid API Key'
+
+    @property
+    def label(self):
+        """Key as shown in reports (never the full secret)"""
+        return f"{self.key[:4]}…{self.key[-2:]}" if self.key and len(self.key) > 8 else '****'
+
+    @property
+    def remaining(self):
+        """Calls left today, or None without a quota"""
+        if self.daily_quota is None:
+            return None
+        return max(0, self.daily_quota - self.used)
+
+    def load(self):
+        """Expected seconds until a new call on this key could start"""
+        return (self.in_flight + 1 - self.limiter.available) / self.limiter.rate
+
+
+class KeyPool:
+    """
+    Scheduler for a pool of API keys
+
+    Every call goes to the healthy key with the lowest load (calls in flight
+    against the tokens its bucket has available), so N keys give roughly N
+    times the single-key request rate while each key stays under its own
+    `requests_per_second`. A key that gets rate limited is benched for a
+    cooldown that doubles with each recent hit; a key that reports its daily
+    limit or is rejected as invalid is taken out of rotation. Usage is counted
+    per UTC day against `daily_quota`.
+    """
+
+    def __init__(self, api_keys, requests_per_second=5, daily_quota=None, cooldown=1.0,
+                 error_window=10, max_cooldown=30):
+        keys = list(dict.fromkeys(key for key in api_keys if key))
+        if not keys:
+            raise ValueError("KeyPool needs at least one API key")
+        self.keys = [ApiKeyState(key, requests_per_second, daily_quota) for key in keys]
+        self.cooldown = cooldown
+        self.error_window = error_window
+        self.max_cooldown = max_cooldown
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+
+    def __len__(self):
+        return len(self.keys)
+
+    @property
+    def requests_per_second(self):
+        """Combined request budget of every usable key"""
+        return sum(state.limiter.rate for state in self.keys if state.disabled is None)
+
+    def _reset_day(self, state):
+        today = datetime.now(timezone.utc).date()
+        if state.day != today:
+            state.day, state.used = today, 0
+            if state.disabled == 'daily quota':
+                state.disabled = None
+
+    def acquire(self):
+        """
+        Reserve the least-loaded healthy key, waiting while all are cooling down
+
+        Returns:
+        ApiKeyState: The reserved key; pass it to release() when the call is done
+
+        Raises:
+        KeyPoolExhausted: If no key has quota left or every key is disabled
+        """
+        with self._lock:
+            while True:
+                now = time.monotonic()
+                usable = []
+                for state in self.keys:
+                    self._reset_day(state)
+                    if state.disabled is None and state.remaining != 0:
+                        usable.append(state)
+                if not usable:
+                    reasons = ', '.join(f"{s.label}: {s.disabled or 'daily quota'}" for s in self.keys)
+                    raise KeyPoolExhausted(f"No API key left to use ({reasons})")
+
+                healthy = [state for state in usable if state.cooldown_until <= now]
+                if healthy:
+                    state = min(healthy, key=ApiKeyState.load)
+                    state.in_flight += 1
+                    state.used += 1
+                    return state
+                self._changed.wait(min(state.cooldown_until for state in usable) - now)
+
+    def release(self, state, error=None):
+        """
+        Return a key after a call
+
+        Parameters:
+        state (ApiKeyState): Key returned by acquire()
+        error (str): Rate-limit message if the call was rejected, else None
+        """
+        with self._lock:
+            state.in_flight -= 1
+            if error is not None:
+                text = error.lower()
+                if 'invalid api key' in text:
+                    state.disabled = error
+                elif 'daily' in text:
+                    state.disabled = 'daily quota'
+                else:
+                    now = time.monotonic()
+                    recent = state.rate_limit_errors
+                    recent.append(now)
+                    while recent and recent[0] < now - self.error_window:
+                        recent.popleft()
+                    penalty = min(self.max_cooldown, self.cooldown * 2 ** (len(recent) - 1))
+                    state.cooldown_until = now + penalty
+            self._changed.notify_all()
+
+    def get_json(self, transport, url, params, max_attempts=None):
+        """
+        GET through the pool: pick a key, set `apikey`, and move to another key
+        when the chosen one is rate limited
+
+        Parameters:
+        transport (HttpTransport): Transport that sends the request
+        url (str): Endpoint URL
+        params (dict): Query parameters (apikey is filled in per attempt)
+        max_attempts (int): Rate-limited attempts before giving up (default: 2 per key + 3)
+
+        Returns:
+        dict: Decoded JSON body
+        """
+        max_attempts = max_attempts or 2 * len(self.keys) + 3
+        last_error = None
+        for _ in range(max_attempts):
+            state = self.acquire()
+            try:
+                data = transport.get_json(url, dict(params, apikey=state.key),
+                                          rate_limiter=state.limiter, raise_on_rate_limit=True)
+            except RateLimitError as e:
+                last_error = str(e)
+                self.release(state, error=last_error)
+                continue
+            except BaseException:
+                self.release(state)
+                raise
+
+            result = data.get('result') if isinstance(data, dict) else None
+            if isinstance(result, str) and 'invalid api key' in result.lower():
+                last_error = result
+                self.release(state, error=result)
+                continue
+            self.release(state)
+            return data
+
+        raise TransportError(f"Every key attempt was rejected ({last_error})")
+
+    def report(self):
+        """Print usage and health per key"""
+        now = time.monotonic()
+        with self._lock:
+            print(f"API key pool: {len(self.keys)} key(s), {self.requests_per_second:g} req/s combined")
+            for state in self.keys:
+                if state.disabled is not None:
+                    health = f"disabled ({state.disabled})"
+                elif state.cooldown_until > now:
+                    health = f"cooling down {state.cooldown_until - now:.0f}s"
+                else:
+                    health = "healthy"
+                quota = f", {state.remaining:,} left today" if state.remaining is not None else ""
+                print(f"  {state.label}: {state.used:,} calls{quota}, "
+                      f"{len(state.rate_limit_errors)} recent rate-limit hit(s), {health}")
@@ -0,0 +1,218 @@
+"""
+Fetch Instrumentation
+Per-action call counts, latency histograms, bytes, retries, rate-limit and cache hits,
+exported as JSON or a Prometheus textfile
+
+Author: Yuyan Kuang
+Date: January 2026
+"""
+
+import json
+import os
+import threading
+import time
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, float('inf'))
+
+
+class ActionStats:
+    """Counters for one API action (e.g. getblocknobytime)"""
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.bytes = 0
+        self.latency_sum = 0.0
+        self.latency_buckets = [0] * len(LATENCY_BUCKETS)
+        self.retries = {}  # reason -> count
+        self.rate_limited = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def observe(self, latency):
+        self.latency_sum += latency
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if latency <= bound:
+                self.latency_buckets[i] += 1
+                break
+
+    def quantile(self, q):
+        """Approximate latency quantile: upper bound of the bucket it falls in"""
+        observed = sum(self.latency_buckets)
+        if not observed:
+            return float('nan')
+        running = 0
+        for bound, count in zip(LATENCY_BUCKETS, self.latency_buckets):
+            running += count
+            if running >= q * observed:
+                return bound
+        return LATENCY_BUCKETS[-1]
+
+    def to_dict(self):
+        observed = sum(self.latency_buckets)
+        return {
+            'calls': self.calls,
+            'errors': self.errors,
+            'bytes_received': self.bytes,
+            'retries': dict(self.retries),
+            'rate_limited': self.rate_limited,
+            'cache_hits': self.cache_hits,
+            'cache_misses': self.cache_misses,
+            'latency_mean_s': self.latency_sum / observed if observed else None,
+            'latency_p50_s': self.quantile(0.5) if observed else None,
+            'latency_p99_s': self.quantile(0.99) if observed else None,
+            'latency_histogram': {('+Inf' if b == float('inf') else str(b)): c
+                                  for b, c in zip(LATENCY_BUCKETS, self.latency_buckets)},
+        }
+
+
+class FetchMetrics:
+    """
+    Thread-safe metrics registry shared by the transport and the fetcher
+
+    HttpTransport records every HTTP attempt (latency, bytes, retries,
+    rate-limit hits, final errors); EtherscanDataFetcher records block cache
+    hits and misses. Actions are the Etherscan `action` parameter or the
+    JSON-RPC method name.
+    """
+
+    def __init__(self):
+        self.actions = {}
+        self.started = time.time()
+        self._lock = threading.Lock()
+        self._live = None
+
+    def _action(self, action):
+        return self.actions.setdefault(action or 'unknown', ActionStats())
+
+    def record_call(self, action, latency, nbytes):
+        """One successful HTTP attempt"""
+        with self._lock:
+            stats = self._action(action)
+            stats.calls += 1
+            stats.bytes += nbytes
+            stats.observe(latency)
+
+    def record_retry(self, action, reason, latency=None):
+        """An attempt that will be retried; reason is e.g. 'http_503' or 'rate_limit'"""
+        with self._lock:
+            stats = self._action(action)
+            stats.retries[reason] = stats.retries.get(reason, 0) + 1
+            if reason in ('rate_limit', 'http_429'):
+                stats.rate_limited += 1
+            if latency is not None:
+                stats.observe(latency)
+
+    def record_error(self, action):
+        """A call that failed for good"""
+        with self._lock:
+            self._action(action).errors += 1
+
+    def record_cache(self, action, hits, misses):
+        with self._lock:
+            stats = self._action(action)
+            stats.cache_hits += hits
+            stats.cache_misses += misses
+
+    def snapshot(self):
+        """All metrics as a plain dict"""
+        with self._lock:
+            return {
+                'started': self.started,
+                'elapsed_s': time.time() - self.started,
+                'actions': {name: stats.to_dict() for name, stats in sorted(self.actions.items())},
+            }
+
+    def summary(self):
+        """One-line summary across all actions"""
+        with self._lock:
+            calls = sum(s.calls for s in self.actions.values())
+            retries = sum(sum(s.retries.values()) for s in self.actions.values())
+            limited = sum(s.rate_limited for s in self.actions.values())
+            errors = sum(s.errors for s in self.actions.values())
+            hits = sum(s.cache_hits for s in self.actions.values())
+            lookups = hits + sum(s.cache_misses for s in self.actions.values())
+            latency = sum(s.latency_sum for s in self.actions.values())
+            observed = sum(sum(s.latency_buckets) for s in self.actions.values())
+        elapsed = max(time.time() - self.started, 1e-9)
+        mean_ms = latency / observed * 1000 if observed else 0.0
+        hit_rate = hits / lookups * 100 if lookups else 0.0
+        return (f"{calls:,} calls ({calls / elapsed:.1f}/s, mean {mean_ms:.0f} ms), "
+                f"{retries:,} retries, {limited:,} rate-limited, {errors:,} errors, "
+                f"cache {hit_rate:.0f}% hit")
+
+    def start_live_summary(self, interval=30):
+        """Print summary() every `interval` seconds from a daemon thread"""
+        stop = threading.Event()
+
+        def loop():
+            while not stop.wait(interval):
+                print(f"\n[metrics] {self.summary()}")
+
+        threading.Thread(target=loop, daemon=True).start()
+        self._live = stop
+
+    def stop_live_summary(self):
+        if self._live is not None:
+            self._live.set()
+            self._live = None
+
+    def write_json(self, path):
+        _atomic_write(path, json.dumps(self.snapshot(), indent=2))
+
+    def write_prometheus(self, path):
+        """Prometheus textfile-collector format (node_exporter --collector.textfile)"""
+        snapshot = self.snapshot()
+        lines = []
+
+        def metric(name, kind, help_text, samples):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                label_text = ','.join(f'{k}="{v}"' for k, v in labels.items())
+                lines.append(f"{name}{{{label_text}}} {value}")
+
+        actions = snapshot['actions']
+        metric('etherscan_requests_total', 'counter', 'Successful HTTP requests',
+               [({'action': a}, s['calls']) for a, s in actions.items()])
+        metric('etherscan_errors_total', 'counter', 'Calls that failed after all retries',
+               [({'action': a}, s['errors']) for a, s in actions.items()])
+        metric('etherscan_response_bytes_total', 'counter', 'Response body bytes received',
+               [({'action': a}, s['bytes_received']) for a, s in actions.items()])
+        metric('etherscan_retries_total', 'counter', 'Retried attempts by reason',
+               [({'action': a, 'reason': r}, n) for a, s in actions.items() for r, n in s['retries'].items()])
+        metric('etherscan_rate_limited_total', 'counter', 'Attempts rejected by rate limiting',
+               [({'action': a}, s['rate_limited']) for a, s in actions.items()])
+        metric('etherscan_cache_hits_total', 'counter', 'Lookups answered by the block cache',
+               [({'action': a}, s['cache_hits']) for a, s in actions.items()])
+        metric('etherscan_cache_misses_total', 'counter', 'Lookups not found in the block cache',
+               [({'action': a}, s['cache_misses']) for a, s in actions.items()])
+
+        lines.append("# HELP etherscan_request_duration_seconds HTTP attempt latency")
+        lines.append("# TYPE etherscan_request_duration_seconds histogram")
+        with self._lock:
+            for action, stats in sorted(self.actions.items()):
+                running = 0
+                for bound, count in zip(LATENCY_BUCKETS, stats.latency_buckets):
+                    running += count
+                    le = '+Inf' if bound == float('inf') else bound
+                    lines.append(f'etherscan_request_duration_seconds_bucket{{action="{action}",le="{le}"}} {running}')
+                lines.append(f'etherscan_request_duration_seconds_sum{{action="{action}"}} {stats.latency_sum}')
+                lines.append(f'etherscan_request_duration_seconds_count{{action="{action}"}} {running}')
+
+        _atomic_write(path, '\n'.join(lines) + '\n')
+
+    def write(self, path):
+        """Write JSON, or Prometheus text for paths ending in .prom"""
+        if path.endswith('.prom'):
+            self.write_prometheus(path)
+        else:
+            self.write_json(path)
+
+
+def _atomic_write(path, text):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
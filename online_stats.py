@@ -0,0 +1,306 @@
+"""
+Online Group Statistics
+Welford accumulators for weekday/weekend and day-of-week groups that update in O(1)
+per observation and can be serialized and merged
+
+Author: Yuyan Kuang
+Date: January 2026
+"""
+
+import json
+import math
+import os
+from statistics import NormalDist
+
+import numpy as np
+import pandas as pd
+
+DAY_NAMES = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+
+
+class RunningStats:
+    """
+    Count, mean, M2 (sum of squared deviations), min and max of a stream
+
+    update() is Welford's algorithm; merge() combines two accumulators with
+    Chan et al.'s parallel formula, so partial results (per file, per
+    process, per batch) can be added together. An empty accumulator has a
+    NaN mean, as pandas gives for an empty group.
+    """
+
+    def __init__(self, count=0, mean=0.0, m2=0.0, min=math.inf, max=-math.inf):
+        self.count = count
+        self._mean = 0.0 if count == 0 else float(mean)
+        self.m2 = m2
+        self.min = min
+        self.max = max
+
+    @property
+    def mean(self):
+        return self._mean if self.count else math.nan
+
+    def update(self, x):
+        """Add one observation"""
+        x = float(x)
+        self.count += 1
+        delta = x - self._mean
+        self._mean += delta / self.count
+        self.m2 += delta * (x - self._mean)
+        self.min = min(self.min, x)
+        self.max = max(self.max, x)
+        return self
+
+    def update_many(self, values):
+        """Add a batch of observations (computed with NumPy, then merged)"""
+        values = np.asarray(values, dtype=float)
+        if len(values):
+            batch_mean = values.mean()
+            self.merge(RunningStats(len(values), batch_mean, ((values - batch_mean) ** 2).sum(),
+                                    values.min(), values.max()))
+        return self
+
+    def merge(self, other):
+        """Fold another accumulator into this one"""
+        if other.count == 0:
+            return self
+        if self.count == 0:
+            self.count, self._mean, self.m2 = other.count, other._mean, other.m2
+            self.min, self.max = other.min, other.max
+            return self
+        count = self.count + other.count
+        delta = other._mean - self._mean
+        self._mean += delta * other.count / count
+        self.m2 += other.m2 + delta ** 2 * self.count * other.count / count
+        self.count = count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    @classmethod
+    def from_values(cls, values):
+        return cls().update_many(values)
+
+    @property
+    def variance(self):
+        """Sample variance (ddof=1)"""
+        return self.m2 / (self.count - 1) if self.count > 1 else math.nan
+
+    @property
+    def std(self):
+        return math.sqrt(self.variance)
+
+    @property
+    def sem(self):
+        """Standard error of the mean"""
+        return self.std / math.sqrt(self.count)
+
+    def to_dict(self):
+        return {'count': self.count, 'mean': self._mean, 'm2': self.m2,
+                'min': self.min if self.count else None,
+                'max': self.max if self.count else None}
+
+    @classmethod
+    def from_dict(cls, d):
+        return cls(d['count'], d['mean'], d['m2'],
+                   math.inf if d['min'] is None else d['min'],
+                   -math.inf if d['max'] is None else d['max'])
+
+
+def pooled_std(a, b):
+    """Pooled standard deviation of two groups"""
+    return math.sqrt((a.m2 + b.m2) / (a.count + b.count - 2))
+
+
+def cohens_d(a, b):
+    """Cohen's d of group a minus group b"""
+    return (a.mean - b.mean) / pooled_std(a, b)
+
+
+def t_test(a, b):
+    """
+    Student's two-sample t-test (equal variances, as scipy.stats.ttest_ind)
+
+    Returns:
+    tuple: (t statistic, two-sided p-value)
+    """
+    from scipy import stats  # Only the p-value needs scipy
+
+    df = a.count + b.count - 2
+    t_stat = (a.mean - b.mean) / (pooled_std(a, b) * math.sqrt(1 / a.count + 1 / b.count))
+    return t_stat, 2 * stats.t.sf(abs(t_stat), df)
+
+
+def mean_difference_ci(a, b, confidence=0.95):
+    """
+    Normal-approximation confidence interval for mean(a) - mean(b)
+
+    Returns:
+    tuple: (difference, lower, upper, standard error)
+    """
+    difference = a.mean - b.mean
+    se = math.sqrt(a.sem ** 2 + b.sem ** 2)
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    return difference, difference - z * se, difference + z * se, se
+
+
+def anova_f(groups):
+    """
+    One-way ANOVA from group accumulators (as scipy.stats.f_oneway)
+
+    Returns:
+    tuple: (F statistic, p-value)
+    """
+    from scipy import stats
+
+    groups = [g for g in groups if g.count]
+    n = sum(g.count for g in groups)
+    k = len(groups)
+    grand_mean = sum(g.count * g.mean for g in groups) / n
+    ss_between = sum(g.count * (g.mean - grand_mean) ** 2 for g in groups)
+    ss_within = sum(g.m2 for g in groups)
+    f_stat = (ss_between / (k - 1)) / (ss_within / (n - k))
+    return f_stat, stats.f.sf(f_stat, k - 1, n - k)
+
+
+class WeekendEffectAccumulator:
+    """
+    Running statistics for the weekday, weekend and each day-of-week group
+
+    Feed it new days as they arrive (update) or whole frames (update_frame);
+    Cohen's d, the t-test, the normal CI and ANOVA are then derived from the
+    accumulators without rescanning history. State round-trips through JSON.
+    """
+
+    def __init__(self):
+        self.groups = {name: RunningStats() for name in ['weekday', 'weekend'] + DAY_NAMES}
+
+    def update(self, date, tx_count):
+        """Add one observation dated `date` (datetime or Timestamp)"""
+        day_name = DAY_NAMES[date.weekday()]
+        self.groups['weekend' if date.weekday() >= 5 else 'weekday'].update(tx_count)
+        self.groups[day_name].update(tx_count)
+        return self
+
+    def update_frame(self, df, column='tx_count'):
+        """Add every row of a frame with 'date' (datetime) and a value column (default 'tx_count')"""
+        day_of_week = df['date'].dt.dayofweek.values
+        values = df[column].values
+        self.groups['weekday'].update_many(values[day_of_week < 5])
+        self.groups['weekend'].update_many(values[day_of_week >= 5])
+        for i, day_name in enumerate(DAY_NAMES):
+            self.groups[day_name].update_many(values[day_of_week == i])
+        return self
+
+    @classmethod
+    def from_frame(cls, df, column='tx_count'):
+        return cls().update_frame(df, column)
+
+    def merge(self, other):
+        for name, group in other.groups.items():
+            self.groups[name].merge(group)
+        return self
+
+    @property
+    def weekday(self):
+        return self.groups['weekday']
+
+    @property
+    def weekend(self):
+        return self.groups['weekend']
+
+    def cohens_d(self):
+        return cohens_d(self.weekday, self.weekend)
+
+    def t_test(self):
+        return t_test(self.weekday, self.weekend)
+
+    def mean_difference_ci(self, confidence=0.95):
+        return mean_difference_ci(self.weekday, self.weekend, confidence)
+
+    def anova_f(self):
+        return anova_f([self.groups[day] for day in DAY_NAMES])
+
+    def to_dict(self):
+        return {name: group.to_dict() for name, group in self.groups.items()}
+
+    @classmethod
+    def from_dict(cls, d):
+        acc = cls()
+        for name, group in d.items():
+            acc.groups[name] = RunningStats.from_dict(group)
+        return acc
+
+    def save(self, path):
+        """Write the state atomically as JSON"""
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self.to_dict(), f, indent=1)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            return cls.from_dict(json.load(f))
+
+
+def rolling_weekend_effect(df, window=90):
+    """
+    Weekday/weekend gap, Cohen's d and t-statistic over a trailing window
+
+    Each group's count, sum and sum of squares are turned into cumulative
+    arrays once; every window's moments are then a difference of two
+    entries, so the whole series costs O(n) regardless of the window length.
+    Missing days inside the range are left out of the windows.
+
+    Parameters:
+    df (DataFrame): Daily rows with 'date' (datetime) and 'tx_count'
+    window (int): Window length in calendar days, ending at (and including) each day
+
+    Returns:
+    DataFrame: date, weekday_days, weekend_days, weekday_mean, weekend_mean,
+               difference, pct_difference, cohens_d, t_stat (NaN until both
+               groups have two days in a full window)
+    """
+    series = df.groupby('date')['tx_count'].mean().sort_index()
+    dates = pd.date_range(series.index.min(), series.index.max(), freq='D')
+    values = series.reindex(dates).values.astype(float)
+    present = ~np.isnan(values)
+    # Centre the values so the sum-of-squares differences do not lose precision
+    centred = np.where(present, values - np.nanmean(values), 0.0)
+    is_weekend = dates.dayofweek >= 5
+
+    moments = {}
+    for name, mask in (('weekday', present & ~is_weekend), ('weekend', present & is_weekend)):
+        x = np.where(mask, centred, 0.0)
+        # Leading zero so window sums are c[i + 1] - c[i + 1 - window]
+        cumulative = [np.concatenate([[0.0], np.cumsum(a)]) for a in (mask.astype(float), x, x * x)]
+        upper = np.arange(1, len(dates) + 1)
+        lower = np.maximum(upper - window, 0)
+        n, s1, s2 = (c[upper] - c[lower] for c in cumulative)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = s1 / n
+            m2 = np.maximum(s2 - s1 * mean, 0.0)
+        moments[name] = (n, mean, m2)
+
+    (n1, mean1, m2_1), (n2, mean2, m2_2) = moments['weekday'], moments['weekend']
+    with np.errstate(invalid='ignore', divide='ignore'):
+        difference = mean1 - mean2
+        pooled = np.sqrt((m2_1 + m2_2) / (n1 + n2 - 2))
+        cohens_d = difference / pooled
+        t_stat = difference / (pooled * np.sqrt(1 / n1 + 1 / n2))
+
+    offset = np.nanmean(values)
+    result = pd.DataFrame({
+        'date': dates,
+        'weekday_days': n1.astype(int),
+        'weekend_days': n2.astype(int),
+        'weekday_mean': mean1 + offset,
+        'weekend_mean': mean2 + offset,
+        'difference': difference,
+        'pct_difference': difference / (mean2 + offset) * 100,
+        'cohens_d': cohens_d,
+        't_stat': t_stat,
+    })
+    incomplete = (np.arange(len(dates)) < window - 1) | (n1 < 2) | (n2 < 2)
+    result.loc[incomplete, result.columns[3:]] = np.nan
+    return result
@@ -0,0 +1,61 @@
+"""
+Rate Limiting for Etherscan API Calls
+Thread-safe token bucket shared by every request a fetcher makes
+
+Author: Yuyan Kuang
+Date: January 2026
+"""
+
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    Token bucket rate limiter
+
+    Tokens refill continuously at `rate` per second up to `capacity`.
+    Each request takes one token, so bursts never exceed `capacity` and the
+    sustained request rate never exceeds `rate`. Safe to share between threads.
+    """
+
+    def __init__(self, rate, capacity=None):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(1.0, rate))
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    def try_acquire(self, tokens=1):
+        """Take tokens if available without waiting; returns True on success"""
+        with self._lock:
+            self._refill()
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return True
+            return False
+
+    def acquire(self, tokens=1):
+        """Block until `tokens` are available, then take them"""
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
+
+    @property
+    def available(self):
+        """Tokens currently available (fractional)"""
+        with self._lock:
+            self._refill()
+            return self._tokens
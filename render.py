@@ -0,0 +1,96 @@
+"""
+Figure Render Pipeline
+Renders figures in a process pool and skips figures whose inputs have not changed
+
+Author: Yuyan Kuang
+Date: January 2026
+"""
+
+import hashlib
+import inspect
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+FINAL_DPI = 300
+PREVIEW_DPI = 72
+MANIFEST_PATH = 'outputs/.figure_hashes.json'
+
+
+def figure_hash(draw, df, path, dpi):
+    """
+    Content hash of everything that determines a figure
+
+    Covers the drawing function's source, the input data (values, column
+    names and dtypes), the output path and the resolution.
+    """
+    h = hashlib.sha256()
+    h.update(f"{draw.__module__}.{draw.__qualname__}|{path}|{dpi}".encode())
+    h.update(inspect.getsource(draw).encode())
+    h.update(repr(list(zip(df.columns, df.dtypes.astype(str)))).encode())
+    h.update(pd.util.hash_pandas_object(df, index=False).values.tobytes())
+    return h.hexdigest()
+
+
+def _load_manifest(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def _save_manifest(manifest, path):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def _render(task):
+    """Draw one figure; runs in a worker process"""
+    draw, df, path, dpi = task
+    draw(df, path, dpi)
+    return path
+
+
+def render_figures(figures, dpi=FINAL_DPI, workers=None, manifest_path=MANIFEST_PATH, force=False):
+    """
+    Render figures in parallel, skipping unchanged ones
+
+    Parameters:
+    figures (list): (draw, df, path) tuples; `draw(df, path, dpi)` must be a
+                    module-level function so worker processes can import it
+    dpi (int): Output resolution (PREVIEW_DPI for quick iterations)
+    workers (int): Worker processes; defaults to one per figure to render
+    manifest_path (str): JSON file remembering each figure's content hash
+    force (bool): Re-render even if nothing changed
+
+    Returns:
+    list: Paths that were (re-)rendered
+    """
+    manifest = _load_manifest(manifest_path)
+    pending = []
+    for draw, df, path in figures:
+        key = figure_hash(draw, df, path, dpi)
+        if not force and manifest.get(path) == key and os.path.exists(path):
+            print(f"✓ Unchanged, not re-rendered: {path}")
+            continue
+        pending.append(((draw, df, path, dpi), key))
+
+    if not pending:
+        return []
+
+    tasks = [task for task, _ in pending]
+    if len(tasks) == 1 or workers == 1:
+        rendered = [_render(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers or len(tasks)) as executor:
+            rendered = list(executor.map(_render, tasks))
+
+    for path, (_, key) in zip(rendered, pending):
+        manifest[path] = key
+        print(f"✓ Saved visualization: {path} ({dpi} dpi)")
+    _save_manifest(manifest, manifest_path)
+    return rendered
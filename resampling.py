@@ -0,0 +1,247 @@
+"""
+Resampling Engines
+Vectorized bootstrap confidence intervals and permutation tests for weekday/weekend contrasts
+
+Author: Yuyan Kuang
+Date: January 2026
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from scipy import stats
+
+
+def _mean_difference(values, is_weekend):
+    """Weekday mean minus weekend mean"""
+    return values[~is_weekend].mean() - values[is_weekend].mean()
+
+
+def _batch_sizes(total, batch_size):
+    """Split `total` resamples into fixed-size batches (last one may be smaller)"""
+    sizes = [batch_size] * (total // batch_size)
+    if total % batch_size:
+        sizes.append(total % batch_size)
+    return sizes
+
+
+def _bootstrap_batch(task):
+    """
+    Draw one batch of bootstrap replicates of the mean difference
+
+    Runs in worker processes, so it only takes plain arrays and a seed.
+    """
+    values, is_weekend, size, method, block_length, seed = task
+    rng = np.random.default_rng(seed)
+
+    if method == 'block':
+        # Circular moving-block bootstrap over the whole date-ordered series;
+        # each day keeps its own weekday/weekend label
+        n = len(values)
+        n_blocks = -(-n // block_length)
+        starts = rng.integers(0, n, size=(size, n_blocks))
+        idx = (starts[:, :, None] + np.arange(block_length)) % n
+        idx = idx.reshape(size, -1)[:, :n]
+        sample = values[idx]
+        weekend = is_weekend[idx]
+        n_weekend = weekend.sum(axis=1)
+        n_weekday = n - n_weekend
+        weekend_sum = np.where(weekend, sample, 0.0).sum(axis=1)
+        weekday_sum = sample.sum(axis=1) - weekend_sum
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return weekday_sum / n_weekday - weekend_sum / n_weekend
+
+    # Independent resampling within each group (percentile and BCa)
+    weekday = values[~is_weekend]
+    weekend = values[is_weekend]
+    weekday_means = weekday[rng.integers(0, len(weekday), size=(size, len(weekday)))].mean(axis=1)
+    weekend_means = weekend[rng.integers(0, len(weekend), size=(size, len(weekend)))].mean(axis=1)
+    return weekday_means - weekend_means
+
+
+def _jackknife_acceleration(values, is_weekend):
+    """BCa acceleration constant from leave-one-out estimates of the mean difference"""
+    weekday = values[~is_weekend]
+    weekend = values[is_weekend]
+    n1, n2 = len(weekday), len(weekend)
+    # Leaving out one observation only moves its own group's mean
+    jack_weekday = (weekday.sum() - weekday) / (n1 - 1) - weekend.mean()
+    jack_weekend = weekday.mean() - (weekend.sum() - weekend) / (n2 - 1)
+    jack = np.concatenate([jack_weekday, jack_weekend])
+    u = jack.mean() - jack
+    denom = 6.0 * (u ** 2).sum() ** 1.5
+    return (u ** 3).sum() / denom if denom > 0 else 0.0
+
+
+def bootstrap_mean_difference(values, is_weekend, n_resamples=10000, method='bca',
+                              confidence=0.95, block_length=7, batch_size=5000,
+                              seed=0, n_jobs=1):
+    """
+    Bootstrap confidence interval for the weekday minus weekend mean
+
+    Resamples are drawn as batched NumPy index arrays. Each batch gets its own
+    child seed spawned from `seed`, so results are identical for any n_jobs.
+
+    Parameters:
+    values (array): Daily transaction counts, in date order for method='block'
+    is_weekend (array): Boolean weekend flag per value
+    n_resamples (int): Number of bootstrap replicates
+    method (str): 'percentile', 'bca' (bias-corrected and accelerated) or
+                  'block' (moving-block bootstrap for autocorrelated series)
+    confidence (float): Confidence level of the interval
+    block_length (int): Block length in days for method='block'
+    batch_size (int): Replicates drawn per vectorized batch
+    seed (int): Seed for reproducible results
+    n_jobs (int): Worker processes; 1 runs in-process
+
+    Returns:
+    dict: estimate, ci_lower, ci_upper, std_error, method, confidence, n_resamples
+    """
+    if method not in ('percentile', 'bca', 'block'):
+        raise ValueError(f"Unknown bootstrap method: {method}")
+
+    values = np.asarray(values, dtype=float)
+    is_weekend = np.asarray(is_weekend, dtype=bool)
+    estimate = _mean_difference(values, is_weekend)
+
+    sizes = _batch_sizes(n_resamples, batch_size)
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    tasks = [(values, is_weekend, size, method, block_length, child)
+             for size, child in zip(sizes, seeds)]
+
+    if n_jobs > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+            replicates = np.concatenate(list(executor.map(_bootstrap_batch, tasks)))
+    else:
+        replicates = np.concatenate([_bootstrap_batch(task) for task in tasks])
+    replicates = replicates[np.isfinite(replicates)]
+
+    alpha = 1 - confidence
+    if method == 'bca':
+        # Bias correction from the share of replicates below the estimate
+        below = (replicates < estimate).mean() + 0.5 * (replicates == estimate).mean()
+        z0 = stats.norm.ppf(np.clip(below, 1e-10, 1 - 1e-10))
+        a = _jackknife_acceleration(values, is_weekend)
+        z = stats.norm.ppf([alpha / 2, 1 - alpha / 2])
+        quantiles = stats.norm.cdf(z0 + (z0 + z) / (1 - a * (z0 + z)))
+    else:
+        quantiles = np.array([alpha / 2, 1 - alpha / 2])
+
+    ci_lower, ci_upper = np.quantile(replicates, quantiles)
+
+    return {
+        'method': method,
+        'estimate': estimate,
+        'ci_lower': ci_lower,
+        'ci_upper': ci_upper,
+        'std_error': replicates.std(ddof=1),
+        'confidence': confidence,
+        'n_resamples': len(replicates),
+    }
+
+
+def _group_statistic(sums, counts, total_sum, total_ss, n, statistic):
+    """Mean difference (group 0 minus group 1) or one-way ANOVA F from group sums"""
+    means = sums / counts
+    if statistic == 'mean_difference':
+        return means[:, 0] - means[:, 1]
+
+    k = len(counts)
+    grand_mean = total_sum / n
+    ss_between = (counts * (means - grand_mean) ** 2).sum(axis=1)
+    ss_within = total_ss - ss_between
+    return (ss_between / (k - 1)) / (ss_within / (n - k))
+
+
+def _permutation_batch(task):
+    """
+    Statistic for one chunk of random label permutations
+
+    Builds a (size, n) matrix of permuted group codes and computes every
+    row's group sums at once: a matrix product for two groups, a single
+    offset np.bincount otherwise.
+    """
+    values, codes, n_groups, size, statistic, seed = task
+    rng = np.random.default_rng(seed)
+    n = len(values)
+
+    labels = rng.permuted(np.tile(codes.astype(np.int8), (size, 1)), axis=1)
+    if n_groups == 2:
+        # Group 1 sums are a single matrix-vector product with the 0/1 labels
+        group1 = labels.astype(np.float64) @ values
+        sums = np.column_stack([values.sum() - group1, group1])
+    else:
+        offsets = labels + n_groups * np.arange(size, dtype=np.int64)[:, None]
+        sums = np.bincount(offsets.ravel(), weights=np.tile(values, size),
+                           minlength=size * n_groups).reshape(size, n_groups)
+
+    # Group sizes, the grand total and the total sum of squares are the same
+    # for every permutation
+    counts = np.bincount(codes, minlength=n_groups)
+    total_ss = ((values - values.mean()) ** 2).sum()
+    return _group_statistic(sums, counts, values.sum(), total_ss, n, statistic)
+
+
+def permutation_test(values, groups, statistic='mean_difference', n_permutations=100000,
+                     chunk_size=None, seed=0, n_jobs=1):
+    """
+    Monte Carlo permutation test under exchangeable labels
+
+    Parameters:
+    values (array): Observations (e.g. daily or hourly transaction counts)
+    groups (array): For 'mean_difference' a boolean weekend flag (the statistic
+                    is weekday mean minus weekend mean); for 'anova_f' any
+                    group label, e.g. day name
+    statistic (str): 'mean_difference' (two-sided) or 'anova_f'
+    n_permutations (int): Number of random permutations
+    chunk_size (int): Permutations per label matrix; by default sized to keep
+                      each matrix around two million entries
+    seed (int): Seed for reproducible results (independent of n_jobs)
+    n_jobs (int): Worker processes; 1 runs in-process
+
+    Returns:
+    dict: statistic, observed, p_value, n_permutations
+    """
+    if statistic not in ('mean_difference', 'anova_f'):
+        raise ValueError(f"Unknown permutation statistic: {statistic}")
+
+    values = np.asarray(values, dtype=float)
+    if statistic == 'mean_difference':
+        # Code weekdays as group 0 and weekends as group 1
+        codes = np.asarray(groups, dtype=bool).astype(np.int64)
+        n_groups = 2
+    else:
+        _, codes = np.unique(np.asarray(groups), return_inverse=True)
+        n_groups = codes.max() + 1
+    n = len(values)
+
+    counts = np.bincount(codes, minlength=n_groups)
+    sums = np.bincount(codes, weights=values, minlength=n_groups)[None, :]
+    total_ss = ((values - values.mean()) ** 2).sum()
+    observed = _group_statistic(sums, counts, values.sum(), total_ss, n, statistic)[0]
+
+    if chunk_size is None:
+        chunk_size = max(1, 2_000_000 // n)
+    sizes = _batch_sizes(n_permutations, chunk_size)
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    tasks = [(values, codes, n_groups, size, statistic, child)
+             for size, child in zip(sizes, seeds)]
+
+    if n_jobs > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+            permuted = np.concatenate(list(executor.map(_permutation_batch, tasks)))
+    else:
+        permuted = np.concatenate([_permutation_batch(task) for task in tasks])
+
+    if statistic == 'mean_difference':
+        extreme = np.count_nonzero(np.abs(permuted) >= abs(observed))
+    else:
+        extreme = np.count_nonzero(permuted >= observed)
+
+    return {
+        'statistic': statistic,
+        'observed': observed,
+        # +1 counts the observed labelling itself, so p is never exactly 0
+        'p_value': (extreme + 1) / (n_permutations + 1),
+        'n_permutations': n_permutations,
+    }
@@ -6,44 +6,70 @@ Author: Yuyan Kuang
 Date: January 2026
 """
 
+import argparse
+import os
+
 import pandas as pd
 import numpy as np
 from scipy import stats
-import matplotlib.pyplot as plt
-import seaborn as sns
+from resampling import bootstrap_mean_difference, permutation_test
+from render import FINAL_DPI, PREVIEW_DPI, render_figures
+from online_stats import RunningStats, WeekendEffectAccumulator, cohens_d as accumulator_cohens_d
+
 
-# Set up plotting style
-sns.set_style("whitegrid")
-plt.rcParams['figure.figsize'] = (12, 8)
+def _plotting():
+    """
+    Import matplotlib and seaborn on first use and apply the plot style
 
+    Keeping them out of module import lets the tests run (and this module be
+    imported as a library) without loading the plotting stack.
+    """
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    sns.set_style("whitegrid")
+    plt.rcParams['figure.figsize'] = (12, 8)
+    return plt, sns
 
-def load_data():
-    """Load the transaction data from CSV"""
+
+def load_data(path='outputs/eth_transaction_data_2025.csv', start=None, end=None, chainid='1'):
+    """
+    Load the transaction data from CSV or a Parquet dataset directory
+    
+    For Parquet, the chain and date-range filters are pushed down to the
+    reader so only the needed partitions and row groups are read.
+    """
     try:
-        df = pd.read_csv('outputs/eth_transaction_data_2025.csv')
-        df['date'] = pd.to_datetime(df['date'])
+        if os.path.isdir(path):
+            import storage  # Parquet support needs pyarrow, so only load it when asked
+            df = storage.read_daily(chainid=chainid, start=start, end=end, root=path)
+        else:
+            df = pd.read_csv(path)
+            df['date'] = pd.to_datetime(df['date'], format='mixed')
+            if start is not None:
+                df = df[df['date'] >= pd.Timestamp(start)]
+            if end is not None:
+                df = df[df['date'] <= pd.Timestamp(end)]
         df['day_of_week'] = df['date'].dt.dayofweek
         df['day_name'] = df['date'].dt.day_name()
         df['is_weekend'] = df['day_of_week'].isin([5, 6])
         return df
     except FileNotFoundError:
-        print("Error: Could not find outputs/eth_transaction_data_2025.csv")
+        print(f"Error: Could not find {path}")
         print("Make sure you've run eth_trading_patterns.py first!")
         return None
 
 
 def calculate_effect_size(weekday_data, weekend_data):
-    """Calculate Cohen's d effect size"""
-    n1, n2 = len(weekday_data), len(weekend_data)
-    var1, var2 = np.var(weekday_data, ddof=1), np.var(weekend_data, ddof=1)
-    
-    # Pooled standard deviation
-    pooled_std = np.sqrt(((n1 - 1) * var1 + (n2 - 1) * var2) / (n1 + n2 - 2))
-    
-    # Cohen's d
-    cohens_d = (np.mean(weekday_data) - np.mean(weekend_data)) / pooled_std
-    
-    return cohens_d
+    """
+    Calculate Cohen's d effect size
+    
+    Accepts arrays of observations or online_stats.RunningStats accumulators.
+    """
+    if not isinstance(weekday_data, RunningStats):
+        weekday_data = RunningStats.from_values(weekday_data)
+    if not isinstance(weekend_data, RunningStats):
+        weekend_data = RunningStats.from_values(weekend_data)
+    return accumulator_cohens_d(weekday_data, weekend_data)
 
 
 def interpret_cohens_d(d):
@@ -59,13 +85,60 @@ def interpret_cohens_d(d):
         return "large"
 
 
-def perform_statistical_tests(df):
+def summarize_weekend_effect(df, n_resamples=2000, n_permutations=10000, seed=0):
+    """
+    Core weekend-effect statistics for one dataset, without printing
+    
+    Used where many datasets are analyzed at once (e.g. batch_runner.py).
+    
+    Returns:
+    dict: Group means, t-test, Mann-Whitney, Cohen's d, BCa bootstrap CI,
+          ANOVA and permutation p-value
+    """
+    weekday_tx = df[~df['is_weekend']]['tx_count'].values
+    weekend_tx = df[df['is_weekend']]['tx_count'].values
+    acc = WeekendEffectAccumulator.from_frame(df)
+    
+    t_stat, p_value_t = acc.t_test()
+    _, p_value_u = stats.mannwhitneyu(weekday_tx, weekend_tx, alternative='two-sided')
+    f_stat, p_value_anova = acc.anova_f()
+    
+    ordered = df.sort_values('date')
+    ci = bootstrap_mean_difference(ordered['tx_count'].values, ordered['is_weekend'].values,
+                                   n_resamples=n_resamples, method='bca', seed=seed)
+    perm = permutation_test(df['tx_count'].values, df['is_weekend'].values,
+                            n_permutations=n_permutations, seed=seed)
+    
+    return {
+        'days': len(df),
+        'weekday_mean': acc.weekday.mean,
+        'weekend_mean': acc.weekend.mean,
+        'difference': acc.weekday.mean - acc.weekend.mean,
+        'pct_difference': (acc.weekday.mean / acc.weekend.mean - 1) * 100,
+        't_stat': t_stat,
+        'p_value_t': p_value_t,
+        'p_value_u': p_value_u,
+        'cohens_d': acc.cohens_d(),
+        'ci_lower': ci['ci_lower'],
+        'ci_upper': ci['ci_upper'],
+        'f_stat': f_stat,
+        'p_value_anova': p_value_anova,
+        'p_value_perm': perm['p_value'],
+    }
+
+
+def perform_statistical_tests(df, n_resamples=10000, n_permutations=20000, n_jobs=1, seed=0):
     """Perform comprehensive statistical tests"""
     
     # Separate weekend and weekday data
     weekday_tx = df[~df['is_weekend']]['tx_count'].values
     weekend_tx = df[df['is_weekend']]['tx_count'].values
     
+    # Moment-based statistics (means, variances, t, d, CI, ANOVA) come from
+    # online accumulators; rank-based tests and resampling need the raw data
+    acc = WeekendEffectAccumulator.from_frame(df)
+    weekday, weekend = acc.weekday, acc.weekend
+    
     print("\n" + "="*70)
     print("STATISTICAL SIGNIFICANCE TESTING - WEEKEND EFFECT")
     print("="*70)
@@ -74,21 +147,21 @@ def perform_statistical_tests(df):
     print("\n1. DESCRIPTIVE STATISTICS:")
     print("-" * 70)
     print(f"Weekday samples: {len(weekday_tx)} days")
-    print(f"  Mean: {np.mean(weekday_tx):,.0f}")
+    print(f"  Mean: {weekday.mean:,.0f}")
     print(f"  Median: {np.median(weekday_tx):,.0f}")
-    print(f"  Std Dev: {np.std(weekday_tx, ddof=1):,.0f}")
-    print(f"  Min: {np.min(weekday_tx):,.0f}")
-    print(f"  Max: {np.max(weekday_tx):,.0f}")
+    print(f"  Std Dev: {weekday.std:,.0f}")
+    print(f"  Min: {weekday.min:,.0f}")
+    print(f"  Max: {weekday.max:,.0f}")
     
     print(f"\nWeekend samples: {len(weekend_tx)} days")
-    print(f"  Mean: {np.mean(weekend_tx):,.0f}")
+    print(f"  Mean: {weekend.mean:,.0f}")
     print(f"  Median: {np.median(weekend_tx):,.0f}")
-    print(f"  Std Dev: {np.std(weekend_tx, ddof=1):,.0f}")
-    print(f"  Min: {np.min(weekend_tx):,.0f}")
-    print(f"  Max: {np.max(weekend_tx):,.0f}")
+    print(f"  Std Dev: {weekend.std:,.0f}")
+    print(f"  Min: {weekend.min:,.0f}")
+    print(f"  Max: {weekend.max:,.0f}")
     
-    difference = np.mean(weekday_tx) - np.mean(weekend_tx)
-    pct_difference = (difference / np.mean(weekend_tx)) * 100
+    difference = weekday.mean - weekend.mean
+    pct_difference = (difference / weekend.mean) * 100
     print(f"\nDifference: {difference:,.0f} ({pct_difference:.2f}%)")
     
     # Test for normality (Shapiro-Wilk test)
@@ -112,7 +185,7 @@ def perform_statistical_tests(df):
     # Independent samples t-test (parametric)
     print("\n3. INDEPENDENT SAMPLES T-TEST (Parametric):")
     print("-" * 70)
-    t_stat, p_value_t = stats.ttest_ind(weekday_tx, weekend_tx)
+    t_stat, p_value_t = acc.t_test()
     
     print(f"t-statistic: {t_stat:.4f}")
     print(f"p-value: {p_value_t:.6f}")
@@ -146,7 +219,7 @@ def perform_statistical_tests(df):
     # Effect size (Cohen's d)
     print("\n5. EFFECT SIZE (Cohen's d):")
     print("-" * 70)
-    cohens_d = calculate_effect_size(weekday_tx, weekend_tx)
+    cohens_d = acc.cohens_d()
     interpretation = interpret_cohens_d(cohens_d)
     
     print(f"Cohen's d: {cohens_d:.4f}")
@@ -161,17 +234,26 @@ def perform_statistical_tests(df):
     print("\n6. 95% CONFIDENCE INTERVAL FOR DIFFERENCE:")
     print("-" * 70)
     
-    # Calculate standard error
-    se_weekday = np.std(weekday_tx, ddof=1) / np.sqrt(len(weekday_tx))
-    se_weekend = np.std(weekend_tx, ddof=1) / np.sqrt(len(weekend_tx))
-    se_diff = np.sqrt(se_weekday**2 + se_weekend**2)
-    
-    # 95% CI
-    ci_lower = difference - 1.96 * se_diff
-    ci_upper = difference + 1.96 * se_diff
+    # 95% CI (normal approximation) from the group standard errors
+    _, ci_lower, ci_upper, _ = acc.mean_difference_ci(0.95)
     
     print(f"Difference: {difference:,.0f}")
-    print(f"95% CI: [{ci_lower:,.0f}, {ci_upper:,.0f}]")
+    print(f"Normal approximation 95% CI: [{ci_lower:,.0f}, {ci_upper:,.0f}]")
+    
+    # Bootstrap CIs: BCa for the two independent groups, and a 7-day block
+    # bootstrap that keeps the autocorrelation of the daily series intact
+    ordered = df.sort_values('date')
+    bootstrap = {}
+    for method in ['bca', 'block']:
+        bootstrap[method] = bootstrap_mean_difference(
+            ordered['tx_count'].values, ordered['is_weekend'].values,
+            n_resamples=n_resamples, method=method, seed=seed, n_jobs=n_jobs)
+    print(f"BCa bootstrap 95% CI:        [{bootstrap['bca']['ci_lower']:,.0f}, "
+          f"{bootstrap['bca']['ci_upper']:,.0f}]  ({n_resamples:,} resamples)")
+    print(f"Block bootstrap 95% CI:      [{bootstrap['block']['ci_lower']:,.0f}, "
+          f"{bootstrap['block']['ci_upper']:,.0f}]  (7-day blocks)")
+    
+    ci_lower, ci_upper = bootstrap['bca']['ci_lower'], bootstrap['bca']['ci_upper']
     print("\nInterpretation: We are 95% confident that the true difference")
     print(f"in transaction counts lies between {ci_lower:,.0f} and {ci_upper:,.0f}.")
     
@@ -179,11 +261,8 @@ def perform_statistical_tests(df):
     print("\n7. ONE-WAY ANOVA (All Days of Week):")
     print("-" * 70)
     
-    # Group by day of week
-    days = [df[df['day_name'] == day]['tx_count'].values 
-            for day in ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']]
-    
-    f_stat, p_value_anova = stats.f_oneway(*days)
+    # Day-of-week groups come straight from the accumulators
+    f_stat, p_value_anova = acc.anova_f()
     
     print(f"F-statistic: {f_stat:.4f}")
     print(f"p-value: {p_value_anova:.6f}")
@@ -201,6 +280,20 @@ def perform_statistical_tests(df):
         print("Result: NOT SIGNIFICANT (p ≥ 0.05)")
         print("No significant differences among days of the week.")
     
+    # Permutation tests: no normality assumption, only exchangeable labels
+    print("\n8. PERMUTATION TESTS (Distribution-free):")
+    print("-" * 70)
+    perm_diff = permutation_test(df['tx_count'].values, df['is_weekend'].values,
+                                 statistic='mean_difference', n_permutations=n_permutations,
+                                 seed=seed, n_jobs=n_jobs)
+    perm_anova = permutation_test(df['tx_count'].values, df['day_name'].values,
+                                  statistic='anova_f', n_permutations=n_permutations,
+                                  seed=seed, n_jobs=n_jobs)
+    
+    print(f"Weekday - weekend mean difference: p = {perm_diff['p_value']:.6f} "
+          f"({n_permutations:,} permutations)")
+    print(f"Day-of-week ANOVA F:               p = {perm_anova['p_value']:.6f}")
+    
     print("\n" + "="*70)
     print("CONCLUSION:")
     print("="*70)
@@ -220,20 +313,27 @@ def perform_statistical_tests(df):
     print("="*70 + "\n")
     
     return {
-        'weekday_mean': np.mean(weekday_tx),
-        'weekend_mean': np.mean(weekend_tx),
+        'weekday_mean': weekday.mean,
+        'weekend_mean': weekend.mean,
         't_stat': t_stat,
         'p_value_t': p_value_t,
         'u_stat': u_stat,
         'p_value_u': p_value_u,
         'cohens_d': cohens_d,
+        'ci_lower': ci_lower,
+        'ci_upper': ci_upper,
+        'block_ci_lower': bootstrap['block']['ci_lower'],
+        'block_ci_upper': bootstrap['block']['ci_upper'],
         'f_stat': f_stat,
-        'p_value_anova': p_value_anova
+        'p_value_anova': p_value_anova,
+        'p_value_perm': perm_diff['p_value'],
+        'p_value_perm_anova': perm_anova['p_value']
     }
 
 
-def create_statistical_visualizations(df):
-    """Create visualizations for statistical analysis"""
+def create_statistical_visualizations(df, path='outputs/statistical_analysis.png', dpi=FINAL_DPI):
+    """Create visualizations for statistical analysis (a render.render_figures draw function)"""
+    plt, sns = _plotting()
     
     fig, axes = plt.subplots(2, 2, figsize=(14, 10))
     
@@ -262,37 +362,66 @@ def create_statistical_visualizations(df):
     axes[1, 0].grid(True, alpha=0.3)
     
     # 4. Violin plot
-    df['Period'] = df['is_weekend'].map({True: 'Weekend', False: 'Weekday'})
+    df = df.assign(Period=df['is_weekend'].map({True: 'Weekend', False: 'Weekday'}))
     sns.violinplot(data=df, x='Period', y='tx_count', ax=axes[1, 1])
     axes[1, 1].set_title('Distribution Comparison (Violin Plot)', fontweight='bold')
     axes[1, 1].set_ylabel('Transaction Count')
     axes[1, 1].set_xlabel('')
     
     plt.tight_layout()
-    plt.savefig('outputs/statistical_analysis.png', dpi=300, bbox_inches='tight')
-    print("✓ Saved statistical visualization: outputs/statistical_analysis.png\n")
+    plt.savefig(path, dpi=dpi, bbox_inches='tight')
     plt.close()
 
 
-def main():
+def parse_args(argv=None):
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description="Statistical tests for the weekend effect")
+    parser.add_argument('--data', default='outputs/eth_transaction_data_2025.csv',
+                        help="Daily dataset: a CSV file or a Parquet dataset directory")
+    parser.add_argument('--start', help="First day to include (YYYY-MM-DD)")
+    parser.add_argument('--end', help="Last day to include (YYYY-MM-DD)")
+    parser.add_argument('--chainid', default='1', help="Chain to load from a Parquet dataset")
+    parser.add_argument('--bootstrap-resamples', type=int, default=10000,
+                        help="Bootstrap resamples for the confidence intervals")
+    parser.add_argument('--permutations', type=int, default=20000,
+                        help="Random permutations for the permutation tests")
+    parser.add_argument('--jobs', type=int, default=1,
+                        help="Worker processes for resampling")
+    parser.add_argument('--seed', type=int, default=0, help="Seed for reproducible resampling")
+    parser.add_argument('--preview', action='store_true',
+                        help=f"Render the figure at {PREVIEW_DPI} dpi for quick iterations")
+    parser.add_argument('--stats-only', action='store_true',
+                        help="Skip the plots (matplotlib is never imported)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
     """Main execution function"""
+    args = parse_args(argv)
+    
     print("\n" + "="*70)
     print("STATISTICAL SIGNIFICANCE ANALYSIS")
     print("Ethereum Weekend Effect - 2025 Data")
     print("="*70)
     
     # Load data
-    df = load_data()
+    df = load_data(args.data, start=args.start, end=args.end, chainid=args.chainid)
     if df is None:
         return
     
     print(f"\nLoaded {len(df)} days of transaction data")
     
     # Perform statistical tests
-    results = perform_statistical_tests(df)
+    results = perform_statistical_tests(df, n_resamples=args.bootstrap_resamples,
+                                        n_permutations=args.permutations,
+                                        n_jobs=args.jobs, seed=args.seed)
     
     # Create visualizations
-    create_statistical_visualizations(df)
+    if not args.stats_only:
+        render_figures([(create_statistical_visualizations, df[['is_weekend', 'tx_count']],
+                         'outputs/statistical_analysis.png')],
+                       dpi=PREVIEW_DPI if args.preview else FINAL_DPI)
+        print()
     
     # Save results to file
     results_text = f"""
@@ -311,6 +440,12 @@ STATISTICAL TESTS:
 - T-test p-value: {results['p_value_t']:.6f}
 - Mann-Whitney U p-value: {results['p_value_u']:.6f}
 - ANOVA p-value: {results['p_value_anova']:.6f}
+- Permutation test p-value (mean difference): {results['p_value_perm']:.6f}
+- Permutation test p-value (ANOVA F): {results['p_value_perm_anova']:.6f}
+
+95% CONFIDENCE INTERVAL FOR DIFFERENCE:
+- BCa bootstrap: [{results['ci_lower']:,.0f}, {results['ci_upper']:,.0f}]
+- Block bootstrap (7-day blocks): [{results['block_ci_lower']:,.0f}, {results['block_ci_upper']:,.0f}]
 
 EFFECT SIZE:
 - Cohen's d: {results['cohens_d']:.4f} ({interpret_cohens_d(results['cohens_d'])} effect)
@@ -328,7 +463,8 @@ The weekend effect is {'STATISTICALLY SIGNIFICANT' if results['p_value_t'] < 0.0
     print("ANALYSIS COMPLETE!")
     print("="*70)
     print("\nGenerated files in outputs/ folder:")
-    print("  • statistical_analysis.png - Visual distributions and Q-Q plots")
+    if not args.stats_only:
+        print("  • statistical_analysis.png - Visual distributions and Q-Q plots")
     print("  • statistical_results.txt - Summary of test results")
     print("\n")
 
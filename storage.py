@@ -0,0 +1,202 @@
+"""
+Columnar Dataset Storage
+Parquet datasets for daily and block-level data, partitioned by chain and month
+
+Author: Yuyan Kuang
+Date: January 2026
+"""
+
+from datetime import timezone
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+
+from block_record import DAY_METRIC_COLUMNS
+
+DAILY_ROOT = 'outputs/parquet/daily'
+BLOCKS_ROOT = 'outputs/parquet/blocks'
+
+DAILY_SCHEMA = pa.schema([
+    ('date', pa.date32()),
+    ('tx_count', pa.uint32()),
+    ('tx_count_se', pa.float64()),
+    ('start_block', pa.int64()),
+    ('end_block', pa.int64()),
+    # Per-day block metrics (--block-metrics); null when they were not collected
+    *[(column, pa.float64()) for column in DAY_METRIC_COLUMNS],
+    ('metric_blocks', pa.int64()),
+    ('chainid', pa.string()),
+    ('month', pa.string()),
+])
+OPTIONAL_DAILY_COLUMNS = list(DAY_METRIC_COLUMNS) + ['metric_blocks']
+
+BLOCK_SCHEMA = pa.schema([
+    ('block_number', pa.int64()),
+    ('timestamp', pa.int64()),
+    ('tx_count', pa.uint32()),
+    ('chainid', pa.string()),
+    ('month', pa.string()),
+])
+
+# chainid and month live in the directory names (chainid=1/month=2025-01/)
+PARTITIONING = ds.partitioning(
+    pa.schema([('chainid', pa.string()), ('month', pa.string())]), flavor='hive'
+)
+
+
+def _write(table, root, append_tag=None):
+    """
+    Write a table into its partitions
+
+    By default the partitions it touches are replaced. With append_tag the
+    files are added next to existing ones under a distinct name instead.
+    """
+    ds.write_dataset(
+        table, root, format='parquet', partitioning=PARTITIONING,
+        existing_data_behavior='delete_matching' if append_tag is None else 'overwrite_or_ignore',
+        basename_template='part-{i}.parquet' if append_tag is None else f'part-{append_tag}-{{i}}.parquet',
+    )
+
+
+def _month_filter(start, end):
+    """Partition filter on the month directory names covering [start, end]"""
+    expr = None
+    if start is not None:
+        expr = ds.field('month') >= pd.Timestamp(start).strftime('%Y-%m')
+    if end is not None:
+        upper = ds.field('month') <= pd.Timestamp(end).strftime('%Y-%m')
+        expr = upper if expr is None else expr & upper
+    return expr
+
+
+def _and(a, b):
+    if a is None:
+        return b
+    if b is None:
+        return a
+    return a & b
+
+
+def write_daily(df, chainid='1', root=DAILY_ROOT):
+    """
+    Store a daily dataset as Parquet
+
+    Parameters:
+    df (DataFrame): Rows with date, tx_count, (tx_count_se), start_block, end_block
+                    and optionally the block metric columns (see block_record.DAY_METRIC_COLUMNS)
+    chainid (str): Chain the data belongs to
+    root (str): Dataset directory
+    """
+    out = pd.DataFrame({
+        'date': pd.to_datetime(df['date'], format='mixed').dt.date,
+        'tx_count': df['tx_count'],
+        'tx_count_se': df['tx_count_se'] if 'tx_count_se' in df else float('nan'),
+        'start_block': df['start_block'],
+        'end_block': df['end_block'],
+    })
+    for column in OPTIONAL_DAILY_COLUMNS:
+        out[column] = df[column] if column in df else None
+    out['metric_blocks'] = out['metric_blocks'].astype('Int64')
+    out['chainid'] = str(chainid)
+    out['month'] = pd.to_datetime(out['date']).dt.strftime('%Y-%m')
+    _write(pa.Table.from_pandas(out, schema=DAILY_SCHEMA, preserve_index=False), root)
+
+
+def read_daily(chainid='1', start=None, end=None, root=DAILY_ROOT, columns=None):
+    """
+    Load a daily Parquet dataset
+
+    Filters on chain and date range are pushed down: whole month partitions
+    outside the range are never opened, and row groups are skipped using
+    their date statistics.
+
+    Returns:
+    DataFrame: Daily rows with a datetime64 'date' column, sorted by date; block
+    metric columns are only included if some day in the range has them
+    """
+    # The full schema lets partitions written before the metric columns existed read as nulls
+    dataset = ds.dataset(root, format='parquet', schema=DAILY_SCHEMA, partitioning=PARTITIONING)
+    expr = _and(ds.field('chainid') == str(chainid), _month_filter(start, end))
+    if start is not None:
+        expr = expr & (ds.field('date') >= pd.Timestamp(start).date())
+    if end is not None:
+        expr = expr & (ds.field('date') <= pd.Timestamp(end).date())
+
+    table = dataset.to_table(columns=columns, filter=expr)
+    df = table.to_pandas()
+    df = df.drop(columns=[column for column in OPTIONAL_DAILY_COLUMNS
+                          if column in df and df[column].isna().all()])
+    if 'date' in df:
+        df['date'] = pd.to_datetime(df['date'])
+        df = df.sort_values('date').reset_index(drop=True)
+    return df
+
+
+def _block_frame(rows, chainid):
+    df = pd.DataFrame(list(rows), columns=['block_number', 'tx_count', 'timestamp'])
+    df['chainid'] = str(chainid)
+    df['month'] = pd.to_datetime(df['timestamp'], unit='s', utc=True).dt.strftime('%Y-%m')
+    return df
+
+
+def write_blocks(rows, chainid='1', root=BLOCKS_ROOT):
+    """
+    Store block-level rows as Parquet, replacing the months they fall in
+
+    Parameters:
+    rows (iterable): (block_number, tx_count, timestamp) tuples
+    """
+    df = _block_frame(rows, chainid)
+    if not df.empty:
+        _write(pa.Table.from_pandas(df, schema=BLOCK_SCHEMA, preserve_index=False), root)
+
+
+def read_blocks(chainid='1', start=None, end=None, root=BLOCKS_ROOT, columns=None):
+    """
+    Load block-level Parquet data for a time range (datetimes, UTC)
+
+    Returns:
+    DataFrame: block_number, timestamp, tx_count sorted by block number
+    """
+    dataset = ds.dataset(root, format='parquet', partitioning=PARTITIONING)
+    expr = _and(ds.field('chainid') == str(chainid), _month_filter(start, end))
+    if start is not None:
+        expr = expr & (ds.field('timestamp') >= int(_utc(start).timestamp()))
+    if end is not None:
+        expr = expr & (ds.field('timestamp') <= int(_utc(end).timestamp()))
+
+    df = dataset.to_table(columns=columns, filter=expr).to_pandas()
+    if 'block_number' in df:
+        df = df.sort_values('block_number').reset_index(drop=True)
+    return df
+
+
+def export_block_cache(cache, chainid='1', start_block=None, end_block=None,
+                       root=BLOCKS_ROOT, chunk_size=500_000):
+    """
+    Copy block-level data from the SQLite BlockCache into Parquet in chunks
+
+    Returns:
+    int: Number of blocks written
+    """
+    written = 0
+    seen_months = set()
+    for chunk_no, chunk in enumerate(cache.iter_blocks(chainid, start_block, end_block,
+                                                       chunk_size=chunk_size)):
+        df = _block_frame([row for row in chunk if row[2] is not None], chainid)
+        for month, part in df.groupby('month'):
+            table = pa.Table.from_pandas(part, schema=BLOCK_SCHEMA, preserve_index=False)
+            # A month spanning several chunks is replaced once, then appended to
+            _write(table, root, append_tag=chunk_no if month in seen_months else None)
+            seen_months.add(month)
+        written += len(df)
+    return written
+
+
+def _utc(value):
+    """Interpret naive datetimes/dates as UTC"""
+    ts = pd.Timestamp(value)
+    if ts.tzinfo is None:
+        ts = ts.tz_localize(timezone.utc)
+    return ts.to_pydatetime()
@@ -0,0 +1,54 @@
+"""
+Tests for AdaptiveSampler: reproducible block choice and calibrated standard errors
+Run with: python -m pytest test_adaptive_sampler.py
+"""
+
+import numpy as np
+
+from adaptive_sampler import AdaptiveSampler
+from chain_simulator import SyntheticChain
+
+JAN_1_2025 = 1735689600
+
+
+def sample_day(chain, start_block, end_block, **kwargs):
+    """Run the sampler over one day of the synthetic chain"""
+    sampler = AdaptiveSampler(start_block, end_block, **kwargs)
+    batch = sampler.next_batch()
+    while batch:
+        for block_num in batch:
+            sampler.add(block_num, chain.tx_count(block_num))
+        batch = sampler.next_batch()
+    return sampler
+
+
+def z_scores(chain, days=200, **kwargs):
+    """(estimate - exact total) / reported standard error for consecutive days"""
+    z = []
+    for day in range(days):
+        start = JAN_1_2025 + day * 86400
+        first = chain.block_by_timestamp(start, 'after')
+        last = chain.block_by_timestamp(start + 86399, 'before')
+        estimate, se = sample_day(chain, first, last, **kwargs).estimate()
+        exact = sum(chain.tx_count(n) for n in range(first, last + 1))
+        z.append((estimate - exact) / se)
+    return np.array(z)
+
+
+def test_same_range_samples_same_blocks():
+    chain = SyntheticChain()
+    runs = [sample_day(chain, 25252969, 25260168) for _ in range(5)]
+    assert len({tuple(sorted(run._stratum_of)) for run in runs}) == 1
+    assert len({run.estimate() for run in runs}) == 1
+
+
+def test_standard_error_is_calibrated_at_defaults():
+    z = z_scores(SyntheticChain())
+    assert 0.8 < z.std() < 1.2
+    assert np.mean(np.abs(z) > 1.96) < 0.1
+
+
+def test_standard_error_is_calibrated_with_tight_target():
+    z = z_scores(SyntheticChain(), target_rel_error=0.02, max_requests=40)
+    assert 0.8 < z.std() < 1.2
+    assert np.mean(np.abs(z) > 1.96) < 0.1
@@ -3,9 +3,10 @@ Simple test script to verify Etherscan API connection
 Run this first to make sure everything is working!
 """
 
-import requests
 import os
 
+from http_transport import HttpTransport
+
 def test_etherscan_api():
     """Test if your Etherscan API key works"""
     
@@ -15,11 +16,13 @@ def test_etherscan_api():
     
     # Get API key
     api_key = os.getenv('ETHERSCAN_API_KEY')
+    transport = HttpTransport(max_retries=3)
     
     
     # Test 1: Check API key is valid
     print("Test 1: Checking if API key is valid...")
-    url = "https://api.etherscan.io/v2/api"
+    # Set ETHERSCAN_BASE_URL to run against a local stand-in (see chain_simulator.py)
+    url = os.getenv('ETHERSCAN_BASE_URL', "https://api.etherscan.io/v2/api")
     params = {
         'chainid': '1',  # Ethereum mainnet
         'module': 'stats',
@@ -28,8 +31,7 @@ def test_etherscan_api():
     }
     
     try:
-        response = requests.get(url, params=params)
-        data = response.json()
+        data = transport.get_json(url, params)
         
         if data['status'] == '1':
             print("✓ API key is valid!")
@@ -52,8 +54,7 @@ def test_etherscan_api():
     }
     
     try:
-        response = requests.get(url, params=params)
-        data = response.json()
+        data = transport.get_json(url, params)
         
         if 'result' in data:
             block_num = int(data['result'], 16)
@@ -77,8 +78,7 @@ def test_etherscan_api():
     }
     
     try:
-        response = requests.get(url, params=params)
-        data = response.json()
+        data = transport.get_json(url, params)
         
         if 'result' in data and data['result']:
             tx_count = len(data['result'].get('transactions', []))
@@ -3,8 +3,10 @@ Improved test script with better debugging
 Run this to diagnose the API connection issue
 """
 
-import requests
 import json
+import os
+
+from http_transport import HttpTransport, TransportError
 
 def test_etherscan_api():
     """Test if your Etherscan API key works"""
@@ -16,6 +18,7 @@ def test_etherscan_api():
     # Get API key
     print("Please enter your Etherscan API key:")
     api_key = input("API Key: ").strip()
+    transport = HttpTransport(max_retries=3)
     
     print(f"\nAPI key length: {len(api_key)} characters")
     print(f"First 8 chars: {api_key[:8]}")
@@ -23,7 +26,8 @@ def test_etherscan_api():
     
     # Test 1: Simple API call
     print("Test 1: Checking API connection...")
-    url = "https://api.etherscan.io/v2/api"
+    # Set ETHERSCAN_BASE_URL to run against a local stand-in (see chain_simulator.py)
+    url = os.getenv('ETHERSCAN_BASE_URL', "https://api.etherscan.io/v2/api")
     params = {
         'chainid': '1',  # Ethereum mainnet
         'module': 'stats',
@@ -35,10 +39,9 @@ def test_etherscan_api():
         print(f"  Making request to: {url}")
         print(f"  Parameters: module=stats, action=ethsupply")
         
-        response = requests.get(url, params=params)
+        response, data = transport.request('GET', url, params=params)
         print(f"  HTTP Status Code: {response.status_code}")
         
-        data = response.json()
         print(f"  Response: {json.dumps(data, indent=2)}\n")
         
         if data.get('status') == '1':
@@ -66,12 +69,12 @@ def test_etherscan_api():
             
             return False
             
-    except requests.exceptions.RequestException as e:
+    except TransportError as e:
+        # Network errors, HTTP errors, bad JSON and rate limits that persisted through retries
         print(f"✗ Network error: {str(e)}\n")
-        return False
-    except json.JSONDecodeError as e:
-        print(f"✗ JSON parsing error: {str(e)}")
-        print(f"  Raw response: {response.text}\n")
+        if 'rate limit' in str(e):
+            print("DIAGNOSIS: Rate limit hit")
+            print("  → Wait a few seconds and try again\n")
         return False
     except Exception as e:
         print(f"✗ Unexpected error: {str(e)}\n")
@@ -87,8 +90,7 @@ def test_etherscan_api():
     }
     
     try:
-        response = requests.get(url, params=params)
-        data = response.json()
+        data = transport.get_json(url, params)
         
         print(f"  Response: {json.dumps(data, indent=2)}\n")
         
@@ -116,8 +118,7 @@ def test_etherscan_api():
     }
     
     try:
-        response = requests.get(url, params=params)
-        data = response.json()
+        data = transport.get_json(url, params)
         
         if 'result' in data and data['result'] and 'transactions' in data['result']:
             tx_count = len(data['result']['transactions'])
@@ -0,0 +1,77 @@
+"""
+Regression tests for BlockIndex day bucketing over a block cache with gaps
+Run with: python -m pytest test_block_index.py
+"""
+
+from datetime import datetime, timezone
+
+from block_cache import BlockCache
+from block_index import BlockIndex
+from block_record import BlockRecord
+from chain_simulator import SyntheticChain
+
+
+def day_blocks(chain, day):
+    """First and last block of a UTC calendar day (YYYY-MM-DD)"""
+    start = int(datetime.strptime(day, '%Y-%m-%d').replace(tzinfo=timezone.utc).timestamp())
+    return chain.block_by_timestamp(start, 'after'), chain.block_by_timestamp(start + 86399, 'before')
+
+
+def crawl(cache, chain, days):
+    """Cache every block of each day, as an --exact run does"""
+    expected = {}
+    for day in days:
+        first, last = day_blocks(chain, day)
+        cache.put_records('1', [BlockRecord.from_block(n, chain.block(n)) for n in range(first, last + 1)])
+        expected[day] = sum(chain.tx_count(n) for n in range(first, last + 1))
+    return expected
+
+
+def sample(cache, chain, days, per_day=5):
+    """Cache a few blocks of each day, as a sampled run does"""
+    for day in days:
+        first, last = day_blocks(chain, day)
+        step = (last - first) // per_day
+        cache.put_records('1', [BlockRecord.from_block(n, chain.block(n))
+                                for n in range(first + step // 2, last, step)])
+
+
+def march(*days):
+    return [f'2025-03-{day:02d}' for day in days]
+
+
+def test_gap_days_are_not_complete(tmp_path):
+    chain = SyntheticChain()
+    cache = BlockCache(str(tmp_path / 'cache.sqlite'))
+    expected = crawl(cache, chain, march(1, 2, 10, 11))
+
+    index = BlockIndex.open(cache, '1', str(tmp_path / 'index'))
+    daily = index.daily_frame('UTC')
+    assert list(daily['date']) == march(1, 2, 10, 11)
+    assert dict(zip(daily['date'], daily['tx_count'])) == expected
+    for row in daily.itertuples():
+        assert (row.start_block, row.end_block) == day_blocks(chain, row.date)
+
+
+def test_later_sampled_blocks_keep_last_exact_day(tmp_path):
+    chain = SyntheticChain()
+    cache = BlockCache(str(tmp_path / 'cache.sqlite'))
+    sample(cache, chain, march(*range(1, 15)))
+    expected = crawl(cache, chain, march(*range(1, 8)))
+
+    daily = BlockIndex.open(cache, '1', str(tmp_path / 'index')).daily_frame('UTC')
+    assert list(daily['date']) == march(*range(1, 8))
+    assert dict(zip(daily['date'], daily['tx_count'])) == expected
+
+
+def test_filling_a_gap_rebuilds_the_index(tmp_path):
+    chain = SyntheticChain()
+    cache = BlockCache(str(tmp_path / 'cache.sqlite'))
+    root = str(tmp_path / 'index')
+    expected = crawl(cache, chain, march(1, 2, 10, 11))
+    assert len(BlockIndex.open(cache, '1', root).daily_frame('UTC')) == 4
+
+    expected.update(crawl(cache, chain, march(*range(3, 10))))
+    daily = BlockIndex.open(cache, '1', root).daily_frame('UTC')
+    assert list(daily['date']) == march(*range(1, 12))
+    assert dict(zip(daily['date'], daily['tx_count'])) == expected